@@ -8,10 +8,118 @@ Compatible with UMC.py and enhanced motor controller system
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
 import paho.mqtt.client as mqtt
+from paho.mqtt import publish as mqtt_publish
 import json
+import queue
+import struct
 import threading
 import time
+from collections import deque
 from datetime import datetime
+from functools import partial
+
+# Prefer a C-accelerated JSON parser for telemetry frames when available;
+# all of these accept bytes directly so the payload never needs decoding.
+# The encoder is instantiated once with compact separators so outbound
+# JSON payloads skip per-call option parsing (orjson returns bytes, which
+# Paho accepts directly).
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    try:
+        import ujson
+        _json_loads = ujson.loads
+    except ImportError:
+        _json_loads = json.loads
+    _json_dumps = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False).encode
+
+# Commands that must never sit in the outbound buffer
+CRITICAL_COMMANDS = {"STOP", "EMERGENCY_STOP", "S", "E"}
+CRITICAL_COMMAND_BYTES = {c.encode() for c in CRITICAL_COMMANDS}
+
+# Oldest log lines are trimmed past this point so the log widget stays O(1)
+MAX_LOG_LINES = 500
+
+# Precompiled telemetry display template - formatted once per render
+# instead of rebuilding an f-string with per-field dict.get calls
+TELEMETRY_TEMPLATE = """ROBOT TELEMETRY
+===============
+Timestamp: {render_timestamp}
+Status: {status}
+Controller: {controller_type}
+Battery: {battery}%
+Temperature: {temperature}°C
+Speed: {speed_percent}%
+Direction: {direction}
+Moving: {is_moving}
+
+Position:
+  X: {pos_x}
+  Y: {pos_y}
+
+MOTOR STATUS
+============
+Left Motor: {left_motor_speed}
+Right Motor: {right_motor_speed}
+
+ADDITIONAL SENSORS
+=================="""
+
+# Keys already shown by the template, skipped by the additional-sensor section
+TELEMETRY_EXCLUDED_KEYS = frozenset({
+    'status', 'battery', 'temperature', 'speed_percent', 'position',
+    'controller_type', 'direction', 'is_moving', 'left_motor_speed',
+    'right_motor_speed', 'timestamp'})
+
+
+class TelemetryDefaults(dict):
+    """Dict that renders missing telemetry fields as N/A"""
+    def __missing__(self, key):
+        return 'N/A'
+
+
+def _rolling_stats(values):
+    """Return (min, mean, max) over a history buffer"""
+    return min(values), sum(values) / len(values), max(values)
+
+# Enhanced command templates keyed by direction
+ENHANCED_COMMANDS = {
+    'forward': 'START_FORWARD:{s}',
+    'backward': 'START_BACKWARD:{s}',
+    'left': 'START_LEFT:{s}',
+    'right': 'START_RIGHT:{s}',
+}
+
+# Opcodes for the compact binary command framing (2 bytes per command);
+# must match the decoder in motor/umc.py
+BINARY_OPS = {
+    'forward': 1,
+    'backward': 2,
+    'left': 3,
+    'right': 4,
+    'stop': 5,
+    'estop': 6,
+    'speed': 7,
+}
+
+# Legacy single character commands
+LEGACY_COMMANDS = {
+    'forward': 'F',
+    'backward': 'B',
+    'left': 'L',
+    'right': 'R',
+    'stop': 'S'
+}
+
+# Every enhanced movement command is one of a small fixed set, so build
+# all of them as UTF-8 bytes up front - the hot path then skips both the
+# string formatting and the encode (Paho publishes bytes as-is)
+COMMAND_BYTES = {('stop', None): b"STOP"}
+for _direction, _template in ENHANCED_COMMANDS.items():
+    for _speed in range(101):
+        COMMAND_BYTES[(_direction, _speed)] = _template.format(s=_speed).encode()
 
 class MQTTRobotController:
     def __init__(self, root):
@@ -33,7 +141,26 @@ class MQTTRobotController:
         
         # Control mode
         self.use_enhanced_commands = tk.BooleanVar(value=True)
+        self.use_binary_commands = tk.BooleanVar(value=False)
         self.current_speed = tk.IntVar(value=50)
+
+        # Outbound command batching - coalesce rapid-fire commands (e.g. key
+        # autorepeat) into one publish per topic per flush window
+        self.outbound_queue = deque()
+        self.outbound_lock = threading.Lock()
+        self.flush_timer = None
+        self.flush_interval_ms = 15
+        self.max_batch_size = 32
+
+        # Speed slider debounce state - publish at most once per 50 ms
+        # while dragging, and always flush the final value on release
+        self._pending_speed_after = None
+        self._last_speed_sent = None
+
+        # Duplicate suppression - held keys autorepeat identical commands,
+        # so drop re-sends of the same payload within the dedupe window
+        self.last_sent = None  # (topic, command, monotonic timestamp)
+        self.dedupe_ms = 100
         
         # Telemetry data
         self.telemetry_data = {
@@ -45,16 +172,67 @@ class MQTTRobotController:
             "controller_type": "unknown"
         }
         
+        # Rolling telemetry history for trend stats (~10 min at 1 Hz);
+        # deque(maxlen=...) gives a fixed-size circular buffer for free
+        self.battery_history = deque(maxlen=600)
+        self.temperature_history = deque(maxlen=600)
+
+        # Telemetry render gating - only redraw when new data has arrived
+        self.telemetry_dirty = threading.Event()
+        self.last_telemetry_hash = None
+        self.telemetry_interval_ms = 1000
+
+        # Log lines queued from MQTT callbacks - Tk widgets are not
+        # thread-safe, so the main loop drains this via root.after
+        self.log_queue = queue.Queue()
+        self._log_lines = 0
+
+        # Raw inbound messages parked here by Paho's network thread so the
+        # socket keeps draining at line rate; oldest entries are dropped on
+        # overflow and the Tk loop does the parsing
+        self.rx_queue = queue.Queue(maxsize=1024)
+
+        # Cache Tk variable values used on the hot send path - every
+        # Variable.get() is a Tcl round-trip, so read once and refresh
+        # via trace when the config tab edits them
+        self._cache_tk_variables()
+
         # Create GUI
         self.create_widgets()
-        
+
         # Bind keyboard events
         self.root.bind('<KeyPress>', self.on_key_press)
         self.root.focus_set()
-        
-        # Start telemetry update thread
-        self.telemetry_thread = threading.Thread(target=self.update_telemetry_display, daemon=True)
-        self.telemetry_thread.start()
+
+        # Schedule periodic UI updates on the Tk event loop (no threads)
+        self.root.after(self.telemetry_interval_ms, self._render_telemetry)
+        self.root.after(50, self._drain_log)
+        self.root.after(20, self._drain_rx)
+
+    def _cache_tk_variables(self):
+        """Mirror hot-path Tk variables into plain attributes kept fresh by traces"""
+        self._enh_topic_cache = self.enhanced_command_topic.get()
+        self._legacy_topic_cache = self.command_topic.get()
+        self._status_topic_cache = self.status_topic.get()
+        self._telemetry_topic_cache = self.telemetry_topic.get()
+        self._use_enhanced_cache = self.use_enhanced_commands.get()
+        self._use_binary_cache = self.use_binary_commands.get()
+        self._bin_topic_cache = self._enh_topic_cache + "/bin"
+
+        def _refresh_enh_topic(*a):
+            self._enh_topic_cache = self.enhanced_command_topic.get()
+            self._bin_topic_cache = self._enh_topic_cache + "/bin"
+        self.enhanced_command_topic.trace('w', _refresh_enh_topic)
+        self.command_topic.trace('w', lambda *a: setattr(
+            self, '_legacy_topic_cache', self.command_topic.get()))
+        self.status_topic.trace('w', lambda *a: setattr(
+            self, '_status_topic_cache', self.status_topic.get()))
+        self.telemetry_topic.trace('w', lambda *a: setattr(
+            self, '_telemetry_topic_cache', self.telemetry_topic.get()))
+        self.use_enhanced_commands.trace('w', lambda *a: setattr(
+            self, '_use_enhanced_cache', self.use_enhanced_commands.get()))
+        self.use_binary_commands.trace('w', lambda *a: setattr(
+            self, '_use_binary_cache', self.use_binary_commands.get()))
 
     def create_widgets(self):
         # Main container with notebook for tabs
@@ -110,6 +288,8 @@ class MQTTRobotController:
                        value=True, command=self.on_mode_change).pack(side=tk.LEFT)
         ttk.Radiobutton(mode_frame, text="Legacy Commands", variable=self.use_enhanced_commands, 
                        value=False, command=self.on_mode_change).pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Checkbutton(mode_frame, text="Binary frames", variable=self.use_binary_commands
+                        ).pack(side=tk.LEFT, padx=(10, 0))
 
     def create_control_tab(self, parent):
         # Main control layout
@@ -142,10 +322,18 @@ class MQTTRobotController:
         self.speed_label = ttk.Label(speed_frame, text="50%")
         self.speed_label.grid(row=0, column=2)
         
-        # Update speed label when scale changes
+        # Update speed label when scale changes and debounce the publish -
+        # a drag fires this continuously, so coalesce to one SPEED command
+        # per 50 ms instead of one per pixel
         def update_speed_label(*args):
             self.speed_label.config(text=f"{self.current_speed.get()}%")
+            if self._pending_speed_after is not None:
+                self.root.after_cancel(self._pending_speed_after)
+            self._pending_speed_after = self.root.after(50, self._flush_speed)
         self.current_speed.trace('w', update_speed_label)
+
+        # The final value always goes out when the drag ends
+        speed_scale.bind('<ButtonRelease-1>', lambda e: self._flush_speed())
         
         # Movement controls
         move_frame = ttk.LabelFrame(control_frame, text="Movement", padding="10")
@@ -156,15 +344,15 @@ class MQTTRobotController:
         button_frame.grid(row=0, column=0)
         
         ttk.Button(button_frame, text="↑\nForward (W)", width=12, 
-                  command=lambda: self.send_movement_command('forward')).grid(row=0, column=1, padx=2, pady=2)
+                  command=partial(self.send_movement_command, 'forward')).grid(row=0, column=1, padx=2, pady=2)
         ttk.Button(button_frame, text="←\nLeft (A)", width=12,
-                  command=lambda: self.send_movement_command('left')).grid(row=1, column=0, padx=2, pady=2)
+                  command=partial(self.send_movement_command, 'left')).grid(row=1, column=0, padx=2, pady=2)
         ttk.Button(button_frame, text="STOP\n(S)", width=12,
-                  command=lambda: self.send_movement_command('stop')).grid(row=1, column=1, padx=2, pady=2)
+                  command=partial(self.send_movement_command, 'stop')).grid(row=1, column=1, padx=2, pady=2)
         ttk.Button(button_frame, text="→\nRight (D)", width=12,
-                  command=lambda: self.send_movement_command('right')).grid(row=1, column=2, padx=2, pady=2)
+                  command=partial(self.send_movement_command, 'right')).grid(row=1, column=2, padx=2, pady=2)
         ttk.Button(button_frame, text="↓\nBackward (X)", width=12,
-                  command=lambda: self.send_movement_command('backward')).grid(row=2, column=1, padx=2, pady=2)
+                  command=partial(self.send_movement_command, 'backward')).grid(row=2, column=1, padx=2, pady=2)
         
         # Additional controls
         extra_frame = ttk.LabelFrame(control_frame, text="Additional Controls", padding="10")
@@ -174,13 +362,13 @@ class MQTTRobotController:
         controls_grid.grid(row=0, column=0)
         
         ttk.Button(controls_grid, text="Rotate Left (Q)", width=15,
-                  command=lambda: self.send_custom_command('q')).grid(row=0, column=0, padx=2, pady=2)
+                  command=partial(self.send_custom_command, 'q')).grid(row=0, column=0, padx=2, pady=2)
         ttk.Button(controls_grid, text="Rotate Right (E)", width=15,
-                  command=lambda: self.send_custom_command('e')).grid(row=0, column=1, padx=2, pady=2)
+                  command=partial(self.send_custom_command, 'e')).grid(row=0, column=1, padx=2, pady=2)
         ttk.Button(controls_grid, text="Emergency Stop", width=15,
-                  command=lambda: self.send_enhanced_command('EMERGENCY_STOP')).grid(row=1, column=0, padx=2, pady=2)
+                  command=partial(self.send_enhanced_command, 'EMERGENCY_STOP')).grid(row=1, column=0, padx=2, pady=2)
         ttk.Button(controls_grid, text="Request Status", width=15,
-                  command=lambda: self.send_enhanced_command('STATUS')).grid(row=1, column=1, padx=2, pady=2)
+                  command=partial(self.send_enhanced_command, 'STATUS')).grid(row=1, column=1, padx=2, pady=2)
         
         # Speed presets
         preset_frame = ttk.LabelFrame(control_frame, text="Speed Presets", padding="10")
@@ -190,11 +378,11 @@ class MQTTRobotController:
         preset_buttons.grid(row=0, column=0)
         
         ttk.Button(preset_buttons, text="Slow (25%)", width=12,
-                  command=lambda: self.set_speed_preset(25)).grid(row=0, column=0, padx=2)
+                  command=partial(self.set_speed_preset, 25)).grid(row=0, column=0, padx=2)
         ttk.Button(preset_buttons, text="Medium (50%)", width=12,
-                  command=lambda: self.set_speed_preset(50)).grid(row=0, column=1, padx=2)
+                  command=partial(self.set_speed_preset, 50)).grid(row=0, column=1, padx=2)
         ttk.Button(preset_buttons, text="Fast (75%)", width=12,
-                  command=lambda: self.set_speed_preset(75)).grid(row=0, column=2, padx=2)
+                  command=partial(self.set_speed_preset, 75)).grid(row=0, column=2, padx=2)
         
         # Custom command entry
         custom_frame = ttk.LabelFrame(control_frame, text="Custom Command", padding="10")
@@ -292,10 +480,49 @@ Keyboard Shortcuts:
         mode = "Enhanced" if self.use_enhanced_commands.get() else "Legacy"
         self.log_message(f"Switched to {mode} command mode")
 
+    def _flush_speed(self):
+        """Publish the current slider speed if it changed since the last send"""
+        if self._pending_speed_after is not None:
+            self.root.after_cancel(self._pending_speed_after)
+            self._pending_speed_after = None
+
+        speed = self.current_speed.get()
+        if speed == self._last_speed_sent:
+            return
+        if self.connected and self._use_enhanced_cache:
+            self._last_speed_sent = speed
+            self.send_enhanced_command(f"SPEED:{speed}")
+
     def set_speed_preset(self, speed):
         self.current_speed.set(speed)
-        if self.use_enhanced_commands.get():
-            self.send_enhanced_command(f"SPEED:{speed}")
+        if self.connected and self._use_enhanced_cache:
+            # Record the send so the slider trace's debounced _flush_speed
+            # doesn't publish the same SPEED command a second time
+            self._last_speed_sent = speed
+            self.send_command_batch([(self._enh_topic_cache, f"SPEED:{speed}")])
+
+    def send_command_batch(self, commands):
+        """Publish a list of (topic, payload) commands as one pipelined burst"""
+        if self.mqtt_client and self.connected:
+            # The outbound queue is bytes-only (see _queue_command) -
+            # encode str payloads before they reach the b"\n".join
+            with self.outbound_lock:
+                self.outbound_queue.extend(
+                    (topic, payload.encode() if isinstance(payload, str)
+                     else payload)
+                    for topic, payload in commands)
+            self._flush_outbound()
+        else:
+            # No live client (e.g. scripted use before connecting): submit
+            # the whole batch over a single short-lived connection. This
+            # runs from button callbacks too, so a dead broker must log
+            # rather than raise out of the Tk event loop.
+            try:
+                mqtt_publish.multiple(
+                    [(topic, payload, 0, False) for topic, payload in commands],
+                    hostname=self.broker_host.get(), port=self.broker_port.get())
+            except Exception as e:
+                self.log_message(f"Batch publish failed (not connected): {str(e)}")
 
     def toggle_connection(self):
         if not self.connected:
@@ -305,7 +532,13 @@ Keyboard Shortcuts:
 
     def connect_to_broker(self):
         try:
-            self.mqtt_client = mqtt.Client()
+            # Persistent session: subscriptions survive connection drops,
+            # so a reconnect skips the resubscribe round-trips
+            self.mqtt_client = mqtt.Client(client_id="rovers-ctrl",
+                                           clean_session=False)
+            # Allow a deeper outbound pipeline than the defaults
+            self.mqtt_client.max_inflight_messages_set(50)
+            self.mqtt_client.max_queued_messages_set(1000)
             self.mqtt_client.on_connect = self.on_mqtt_connect
             self.mqtt_client.on_message = self.on_mqtt_message
             self.mqtt_client.on_disconnect = self.on_mqtt_disconnect
@@ -335,10 +568,14 @@ Keyboard Shortcuts:
             self.status_label.config(text="Status: Connected", foreground="green")
             self.log_message("Connected to MQTT broker")
             
-            # Subscribe to telemetry and status topics
-            client.subscribe(self.status_topic.get())
-            client.subscribe(self.telemetry_topic.get())
-            self.log_message(f"Subscribed to: {self.status_topic.get()}, {self.telemetry_topic.get()}")
+            # Subscribe to telemetry and status topics, unless the broker
+            # restored our persistent session and still has them
+            if flags.get('session present'):
+                self.log_message("Session resumed, subscriptions restored by broker")
+            else:
+                client.subscribe(self._status_topic_cache)
+                client.subscribe(self._telemetry_topic_cache)
+                self.log_message(f"Subscribed to: {self._status_topic_cache}, {self._telemetry_topic_cache}")
         else:
             self.log_message(f"MQTT connection failed with code: {rc}")
 
@@ -349,25 +586,65 @@ Keyboard Shortcuts:
         self.log_message("Disconnected from MQTT broker")
 
     def on_mqtt_message(self, client, userdata, msg):
+        # Runs on Paho's network thread - just park the raw message so the
+        # socket keeps draining; drop the oldest entry if we're falling behind
         try:
-            topic = msg.topic
-            payload = msg.payload.decode('utf-8')
-            
-            # Try to parse as JSON for structured data
+            self.rx_queue.put_nowait((msg.topic, msg.payload))
+        except queue.Full:
+            try:
+                self.rx_queue.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                self.rx_queue.put_nowait((msg.topic, msg.payload))
+            except queue.Full:
+                pass
+
+    def _drain_rx(self):
+        """Parse queued inbound messages on the Tk event loop"""
+        try:
+            while True:
+                try:
+                    topic, payload = self.rx_queue.get_nowait()
+                except queue.Empty:
+                    break
+                self._process_message(topic, payload)
+        finally:
+            self.root.after(20, self._drain_rx)
+
+    def _record_history(self, data):
+        """Push numeric telemetry fields into the rolling history buffers"""
+        battery = data.get('battery')
+        if isinstance(battery, (int, float)):
+            self.battery_history.append(battery)
+        temperature = data.get('temperature')
+        if isinstance(temperature, (int, float)):
+            self.temperature_history.append(temperature)
+
+    def _process_message(self, topic, payload):
+        try:
+            # Try to parse as JSON for structured data; the parser takes the
+            # raw bytes so we only decode for the plain-text log path
             try:
-                data = json.loads(payload)
-                if topic == self.status_topic.get():
+                data = _json_loads(payload)
+                if topic == self._status_topic_cache:
                     # Update telemetry with status data
                     self.telemetry_data.update(data)
-                elif topic == self.telemetry_topic.get():
+                    self._record_history(data)
+                    self.telemetry_dirty.set()
+                elif topic == self._telemetry_topic_cache:
                     # Update telemetry with sensor data
                     self.telemetry_data.update(data)
+                    self._record_history(data)
+                    self.telemetry_dirty.set()
+
+                self.log_message(
+                    f"Received from {topic}: {payload[:100].decode('utf-8', 'replace')}...")
                 
-                self.log_message(f"Received from {topic}: {payload[:100]}...")
-                
-            except json.JSONDecodeError:
+            except ValueError:
                 # Handle plain text messages
-                self.log_message(f"Received from {topic}: {payload}")
+                self.log_message(
+                    f"Received from {topic}: {payload.decode('utf-8', 'replace')}")
                 
         except Exception as e:
             self.log_message(f"Error processing message: {str(e)}")
@@ -377,47 +654,131 @@ Keyboard Shortcuts:
             messagebox.showwarning("Not Connected", "Please connect to MQTT broker first")
             return
         
-        if self.use_enhanced_commands.get():
-            # Enhanced command format
-            speed = self.current_speed.get()
-            if direction == 'forward':
-                command = f"START_FORWARD:{speed}"
-            elif direction == 'backward':
-                command = f"START_BACKWARD:{speed}"
-            elif direction == 'left':
-                command = f"START_LEFT:{speed}"
-            elif direction == 'right':
-                command = f"START_RIGHT:{speed}"
-            elif direction == 'stop':
-                command = "STOP"
-            
+        if self._use_enhanced_cache:
+            if self._use_binary_cache:
+                self.send_binary_command(direction)
+                return
+            # Enhanced command format - precomputed bytes for the fixed set
+            if direction == 'stop':
+                command = COMMAND_BYTES[('stop', None)]
+            else:
+                speed = self.current_speed.get()
+                command = COMMAND_BYTES.get((direction, speed))
+                if command is None:
+                    command = ENHANCED_COMMANDS[direction].format(s=speed).encode()
             self.send_enhanced_command(command)
         else:
             # Legacy single character commands
-            legacy_map = {
-                'forward': 'F',
-                'backward': 'B',
-                'left': 'L',
-                'right': 'R',
-                'stop': 'S'
-            }
-            if direction in legacy_map:
-                self.send_legacy_command(legacy_map[direction])
-
-    def send_enhanced_command(self, command):
+            if direction in LEGACY_COMMANDS:
+                self.send_legacy_command(LEGACY_COMMANDS[direction])
+
+    def send_binary_command(self, direction):
+        """Publish a 2-byte (opcode, speed) frame - stays well under the
+        small-payload throughput knee, unlike the ASCII commands"""
+        if not (self.mqtt_client and self.connected):
+            return
+        op = BINARY_OPS.get(direction)
+        if op is None:
+            return
+        speed = 0 if direction == 'stop' else self.current_speed.get()
+        qos = 1 if direction in ('stop', 'estop') else 0
+        self.mqtt_client.publish(self._bin_topic_cache,
+                                 struct.pack('!BB', op, speed), qos=qos)
+        self.log_message(f"Binary command sent: {direction} ({speed}%)")
+
+    def send_enhanced_command(self, command, write_and_flush=False):
         if self.mqtt_client and self.connected:
-            topic = self.enhanced_command_topic.get()
-            self.mqtt_client.publish(topic, command)
+            topic = self._enh_topic_cache
+            self._queue_command(topic, command, write_and_flush)
+            if isinstance(command, bytes):
+                command = command.decode()
             self.log_message(f"Enhanced command sent: {command}")
 
-    def send_legacy_command(self, command):
+    def send_legacy_command(self, command, write_and_flush=False):
         if self.mqtt_client and self.connected:
-            topic = self.command_topic.get()
-            self.mqtt_client.publish(topic, command)
+            topic = self._legacy_topic_cache
+            self._queue_command(topic, command, write_and_flush)
             self.log_message(f"Legacy command sent: {command}")
 
+    def _is_duplicate(self, topic, command):
+        """Check whether this exact command was just sent (key autorepeat)"""
+        if command in CRITICAL_COMMAND_BYTES:
+            # Stop commands always go through and clear the cache
+            self.last_sent = None
+            return False
+        now = time.monotonic()
+        if self.last_sent:
+            last_topic, last_command, last_time = self.last_sent
+            if (last_topic == topic and last_command == command and
+                    (now - last_time) < self.dedupe_ms / 1000.0):
+                return True
+        self.last_sent = (topic, command, now)
+        return False
+
+    def _queue_command(self, topic, command, write_and_flush=False):
+        """Buffer a command for batched publish, flushing critical ones immediately"""
+        # The outbound pipeline is bytes-only; movement commands arrive
+        # pre-encoded, everything else is encoded once here
+        if isinstance(command, str):
+            command = command.encode()
+        if self._is_duplicate(topic, command):
+            return
+        with self.outbound_lock:
+            self.outbound_queue.append((topic, command))
+            should_flush = (write_and_flush or
+                            self._is_critical(command) or
+                            len(self.outbound_queue) >= self.max_batch_size)
+            if should_flush:
+                if self.flush_timer:
+                    self.flush_timer.cancel()
+                    self.flush_timer = None
+            elif self.flush_timer is None:
+                self.flush_timer = threading.Timer(self.flush_interval_ms / 1000.0,
+                                                   self._flush_outbound)
+                self.flush_timer.daemon = True
+                self.flush_timer.start()
+        if should_flush:
+            self._flush_outbound()
+
+    def _flush_outbound(self):
+        """Publish all queued commands, one batched payload per topic"""
+        with self.outbound_lock:
+            pending = list(self.outbound_queue)
+            self.outbound_queue.clear()
+            self.flush_timer = None
+
+        if not pending or not (self.mqtt_client and self.connected):
+            return
+
+        # Group consecutive commands by topic so ordering is preserved
+        current_topic = None
+        payloads = []
+        for topic, command in pending:
+            if topic != current_topic and payloads:
+                self._publish_batch(current_topic, payloads)
+                payloads = []
+            current_topic = topic
+            payloads.append(command)
+        if payloads:
+            self._publish_batch(current_topic, payloads)
+
+    def _publish_batch(self, topic, payloads):
+        """Publish one batched payload; QoS 1 only when a critical command is aboard"""
+        # Movement commands stream at QoS 0 - waiting on PUBACKs would
+        # serialize the high-rate path. STOP/EMERGENCY_STOP and speed
+        # changes must arrive exactly, so those ride at QoS 1 and Paho
+        # handles the ack asynchronously.
+        qos = 1 if any(self._is_critical(c) for c in payloads) else 0
+        self.mqtt_client.publish(topic, b"\n".join(payloads), qos=qos)
+
+    @staticmethod
+    def _is_critical(command):
+        if isinstance(command, str):
+            return command in CRITICAL_COMMANDS or command.startswith("SPEED:")
+        return command in CRITICAL_COMMAND_BYTES or command.startswith(b"SPEED:")
+
     def send_custom_command(self, command):
-        if self.use_enhanced_commands.get():
+        if self._use_enhanced_cache:
             self.send_enhanced_command(command)
         else:
             self.send_legacy_command(command)
@@ -449,61 +810,80 @@ Keyboard Shortcuts:
         elif key == 'e':
             self.send_custom_command('e')
 
-    def update_telemetry_display(self):
-        """Update telemetry display every second"""
-        while True:
-            if self.connected:
-                timestamp = datetime.now().strftime('%H:%M:%S')
-                
-                telemetry_str = f"""ROBOT TELEMETRY
-===============
-Timestamp: {timestamp}
-Status: {self.telemetry_data.get('status', 'Unknown')}
-Controller: {self.telemetry_data.get('controller_type', 'Unknown')}
-Battery: {self.telemetry_data.get('battery', 0)}%
-Temperature: {self.telemetry_data.get('temperature', 0)}°C
-Speed: {self.telemetry_data.get('speed_percent', 0)}%
-Direction: {self.telemetry_data.get('direction', 'Unknown')}
-Moving: {self.telemetry_data.get('is_moving', False)}
+    def _render_telemetry(self):
+        """Render telemetry on the Tk event loop when new data has arrived"""
+        try:
+            if self.connected and self.telemetry_dirty.is_set():
+                self.telemetry_dirty.clear()
 
-Position:
-  X: {self.telemetry_data.get('position', {}).get('x', 0)}
-  Y: {self.telemetry_data.get('position', {}).get('y', 0)}
+                # Skip the Tk redraw entirely if nothing actually changed
+                state_hash = hash(repr(sorted(self.telemetry_data.items())))
+                if state_hash == self.last_telemetry_hash:
+                    return
+                self.last_telemetry_hash = state_hash
 
-MOTOR STATUS
-============
-Left Motor: {self.telemetry_data.get('left_motor_speed', 'N/A')}
-Right Motor: {self.telemetry_data.get('right_motor_speed', 'N/A')}
+                data = TelemetryDefaults(self.telemetry_data)
+                data['render_timestamp'] = datetime.now().strftime('%H:%M:%S')
+                position = self.telemetry_data.get('position', {})
+                data['pos_x'] = position.get('x', 0)
+                data['pos_y'] = position.get('y', 0)
+
+                telemetry_str = TELEMETRY_TEMPLATE.format_map(data)
 
-ADDITIONAL SENSORS
-=================="""
-                
                 # Add any additional sensor data
-                excluded_keys = {'status', 'battery', 'temperature', 'speed_percent', 'position', 
-                               'controller_type', 'direction', 'is_moving', 'left_motor_speed', 
-                               'right_motor_speed', 'timestamp'}
-                
-                for key, value in self.telemetry_data.items():
-                    if key not in excluded_keys:
-                        telemetry_str += f"\n{key}: {value}"
-                
+                telemetry_str += ''.join(
+                    f"\n{key}: {value}"
+                    for key, value in self.telemetry_data.items()
+                    if key not in TELEMETRY_EXCLUDED_KEYS)
+
+                # Rolling trend stats over the telemetry history window
+                if self.battery_history:
+                    telemetry_str += "\n\nTRENDS\n======"
+                    telemetry_str += "\nBattery min/avg/max: %.1f / %.1f / %.1f" % (
+                        _rolling_stats(self.battery_history))
+                    if self.temperature_history:
+                        telemetry_str += "\nTemp min/avg/max: %.1f / %.1f / %.1f" % (
+                            _rolling_stats(self.temperature_history))
+
                 # Update display
                 self.telemetry_text.config(state='normal')
                 self.telemetry_text.delete(1.0, tk.END)
                 self.telemetry_text.insert(1.0, telemetry_str)
                 self.telemetry_text.config(state='disabled')
-            
-            time.sleep(1)
+        finally:
+            self.root.after(self.telemetry_interval_ms, self._render_telemetry)
 
     def log_message(self, message):
-        """Add message to log with timestamp"""
+        """Queue a log message for display (safe to call from any thread)"""
         timestamp = datetime.now().strftime('%H:%M:%S')
-        log_entry = f"[{timestamp}] {message}\n"
-        
-        self.log_text.config(state='normal')
-        self.log_text.insert(tk.END, log_entry)
-        self.log_text.see(tk.END)
-        self.log_text.config(state='disabled')
+        self.log_queue.put(f"[{timestamp}] {message}\n")
+
+    def _drain_log(self):
+        """Flush queued log lines into the log widget in one insert"""
+        try:
+            entries = []
+            while True:
+                try:
+                    entries.append(self.log_queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            if entries:
+                self.log_text.config(state='normal')
+                self.log_text.insert(tk.END, ''.join(entries))
+
+                # Trim oldest lines in one delete so the widget never grows
+                # unbounded on a long-running session
+                self._log_lines += len(entries)
+                if self._log_lines > MAX_LOG_LINES:
+                    excess = self._log_lines - MAX_LOG_LINES
+                    self.log_text.delete('1.0', f'{excess + 1}.0')
+                    self._log_lines = MAX_LOG_LINES
+
+                self.log_text.see(tk.END)
+                self.log_text.config(state='disabled')
+        finally:
+            self.root.after(50, self._drain_log)
 
 def main():
     root = tk.Tk()
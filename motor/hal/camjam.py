@@ -2,7 +2,33 @@
 # Enhanced CamJam HAL with continuous control and speed management
 
 from gpiozero import CamJamKitRobot
-import time
+import threading
+
+# Integer codes for the motor-value kernel below
+_DIRECTION_CODES = {"FORWARD": 1, "BACKWARD": 2, "LEFT": 3, "RIGHT": 4}
+
+
+def _compute_motor_values(direction_code, left_speed, right_speed):
+    """Compute the (left, right) motor values for a direction code"""
+    if direction_code == 1:    # FORWARD
+        return left_speed, right_speed
+    elif direction_code == 2:  # BACKWARD
+        return -left_speed, -right_speed
+    elif direction_code == 3:  # LEFT
+        return left_speed, 0.0
+    elif direction_code == 4:  # RIGHT
+        return 0.0, right_speed
+    return 0.0, 0.0
+
+
+# JIT-compile the kernel when numba is installed - pays off if this HAL
+# ever runs closed-loop control at high rates; pure Python otherwise
+try:
+    from numba import njit
+    _compute_motor_values = njit(cache=True)(_compute_motor_values)
+except ImportError:
+    pass
+
 
 class CamJamController:
     def __init__(self):
@@ -11,24 +37,45 @@ class CamJamController:
         
         # State tracking
         self.current_speed = 0.5  # 0.0 to 1.0 (CamJam uses this range)
+        self.current_speed_percent = 50  # int mirror for status reporting
         self.current_direction = "STOPPED"
-        self.is_moving = False
         
         # Motor speed tuples for different directions
         self.left_motor_speed = 0.5
         self.right_motor_speed = 0.5
-        
+
+        self._stop_timer = None  # pending timed stop from the legacy API
+
+        # Reused status dict - refreshed in place by get_status so a
+        # polling loop doesn't allocate a new dict per call
+        self._status = {
+            "speed_percent": 50,
+            "direction": "STOPPED",
+            "is_moving": False,
+            "left_motor_speed": 0.5,
+            "right_motor_speed": 0.5,
+        }
+
+
     def set_speed(self, speed_percent):
         """Set motor speed as percentage (0-100)"""
         if speed_percent < 0:
             speed_percent = 0
         elif speed_percent > 100:
             speed_percent = 100
-            
-        self.current_speed = speed_percent / 100.0
+
+        new_speed = speed_percent / 100.0
+
+        # Skip the motor write when the speed hasn't actually changed -
+        # re-programming PWM is syscall-heavy on the Pi
+        if new_speed == self.current_speed and self.is_moving:
+            return
+
+        self.current_speed_percent = speed_percent
+        self.current_speed = new_speed
         self.left_motor_speed = self.current_speed
         self.right_motor_speed = self.current_speed
-        
+
         # If currently moving, apply new speed immediately
         if self.is_moving:
             self._apply_current_movement()
@@ -37,56 +84,55 @@ class CamJamController:
         """Start moving forward at specified speed"""
         self.set_speed(speed_percent)
         self.current_direction = "FORWARD"
-        self.is_moving = True
         self._apply_current_movement()
         
     def start_backward(self, speed_percent=50):
         """Start moving backward at specified speed"""
         self.set_speed(speed_percent)
         self.current_direction = "BACKWARD"
-        self.is_moving = True
         self._apply_current_movement()
         
     def start_left(self, speed_percent=50):
         """Start turning left at specified speed"""
         self.set_speed(speed_percent)
         self.current_direction = "LEFT"
-        self.is_moving = True
         self._apply_current_movement()
         
     def start_right(self, speed_percent=50):
         """Start turning right at specified speed"""
         self.set_speed(speed_percent)
         self.current_direction = "RIGHT"
-        self.is_moving = True
         self._apply_current_movement()
         
     def stop(self):
         """Stop all motors immediately"""
+        if self._stop_timer is not None:
+            self._stop_timer.cancel()
+            self._stop_timer = None
         self.robot.stop()
         self.current_direction = "STOPPED"
-        self.is_moving = False
         
     def _apply_current_movement(self):
         """Apply current direction and speed to motors"""
-        if self.current_direction == "FORWARD":
-            self.robot.value = (self.left_motor_speed, self.right_motor_speed)
-        elif self.current_direction == "BACKWARD":
-            self.robot.value = (-self.left_motor_speed, -self.right_motor_speed)
-        elif self.current_direction == "LEFT":
-            self.robot.value = (self.left_motor_speed, 0)
-        elif self.current_direction == "RIGHT":
-            self.robot.value = (0, self.right_motor_speed)
-            
+        code = _DIRECTION_CODES.get(self.current_direction, 0)
+        if code:
+            self.robot.value = _compute_motor_values(
+                code, self.left_motor_speed, self.right_motor_speed)
+
+    @property
+    def is_moving(self):
+        """Movement is implied by a non-STOPPED direction"""
+        return self.current_direction != "STOPPED"
+
     def get_status(self):
         """Return current motor status"""
-        return {
-            "speed_percent": int(self.current_speed * 100),
-            "direction": self.current_direction,
-            "is_moving": self.is_moving,
-            "left_motor_speed": self.left_motor_speed,
-            "right_motor_speed": self.right_motor_speed
-        }
+        status = self._status
+        status["speed_percent"] = self.current_speed_percent
+        status["direction"] = self.current_direction
+        status["is_moving"] = self.is_moving
+        status["left_motor_speed"] = self.left_motor_speed
+        status["right_motor_speed"] = self.right_motor_speed
+        return status
         
     def cleanup(self):
         """Safe shutdown of motor controller"""
@@ -95,45 +141,45 @@ class CamJamController:
     # Motor calibration functions
     def set_motor_speeds(self, left_speed_percent, right_speed_percent):
         """Set individual motor speeds for calibration"""
-        self.left_motor_speed = left_speed_percent / 100.0
-        self.right_motor_speed = right_speed_percent / 100.0
-        
+        new_speeds = (left_speed_percent / 100.0, right_speed_percent / 100.0)
+        if new_speeds == (self.left_motor_speed, self.right_motor_speed):
+            return
+
+        self.left_motor_speed, self.right_motor_speed = new_speeds
+
         if self.is_moving:
             self._apply_current_movement()
             
+
+    def _schedule_stop(self, duration):
+        """Arm a timer that stops the motors after the given delay"""
+        if self._stop_timer is not None:
+            self._stop_timer.cancel()
+        self._stop_timer = threading.Timer(duration, self.stop)
+        self._stop_timer.daemon = True
+        self._stop_timer.start()
+
     # Legacy functions for backward compatibility (deprecated)
     def forward(self, duration=0):
         """Legacy function - use start_forward() instead"""
+        self.start_forward()
         if duration > 0:
-            self.start_forward()
-            time.sleep(duration)
-            self.stop()
-        else:
-            self.start_forward()
+            self._schedule_stop(duration)
             
     def backward(self, duration=0):
         """Legacy function - use start_backward() instead"""
+        self.start_backward()
         if duration > 0:
-            self.start_backward()
-            time.sleep(duration)
-            self.stop()
-        else:
-            self.start_backward()
+            self._schedule_stop(duration)
             
     def left(self, duration=0):
         """Legacy function - use start_left() instead"""
+        self.start_left()
         if duration > 0:
-            self.start_left()
-            time.sleep(duration)
-            self.stop()
-        else:
-            self.start_left()
+            self._schedule_stop(duration)
             
     def right(self, duration=0):
         """Legacy function - use start_right() instead"""
+        self.start_right()
         if duration > 0:
-            self.start_right()
-            time.sleep(duration)
-            self.stop()
-        else:
-            self.start_right()
+            self._schedule_stop(duration)
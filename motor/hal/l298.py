@@ -2,137 +2,378 @@
 # Enhanced L298 HAL with continuous control and speed management
 
 import RPi.GPIO as GPIO
-import time
+import mmap
+import os
+import socket
+import struct
+import threading
+
+# Module-level bindings for the RPi.GPIO fallback hot path - a global
+# load is cheaper than two attribute lookups into the GPIO module per
+# direction change
+_output = GPIO.output
+_HIGH = GPIO.HIGH
+_LOW = GPIO.LOW
+
+# pigpio is optional; when its daemon is running we prefer it for both
+# bank-wide direction writes and DMA-timed PWM
+try:
+    import pigpio
+except ImportError:
+    pigpio = None
+
+# BCM2835 GPIO register byte offsets within the mmap'd /dev/gpiomem page.
+# Writes to GPSET0/GPCLR0 only affect the bits that are set, so one store
+# per register flips any number of pins in bank 0 atomically.
+GPSET0 = 0x1C
+GPCLR0 = 0x28
+
+# Hardware PWM via the kernel's sysfs interface (requires
+# dtoverlay=pwm-2chan with PWM0 on GPIO18 and PWM1 on GPIO13).
+# 1 kHz period, matching the old software PWM frequency.
+PWM_CHIP = "/sys/class/pwm/pwmchip0"
+PWM_PERIOD_NS = 1000000
+
+# Socket of an optional motor daemon that owns the GPIO registers and
+# PWM block. When it is listening, every motor change collapses to one
+# 2-byte (direction, speed) datagram. The daemon ships separately; this
+# module only speaks its protocol when the socket exists at init.
+MOTOR_SOCKET = "/run/rovers.sock"
+_DIRECTION_CODES = {"STOPPED": 0, "FORWARD": 1, "BACKWARD": 2,
+                    "LEFT": 3, "RIGHT": 4}
 
 class L298Controller:
     def __init__(self):
         # L298 motor pin configuration
         # 1st motor
+        # ENA moved from GPIO16 to GPIO18 so both enable pins sit on true
+        # hardware PWM channels (GPIO18 = PWM0, GPIO13 = PWM1); software
+        # PWM jitters and burns CPU in a background thread
         self.in1 = 21
         self.in2 = 20
-        self.ena = 16
+        self.ena = 18
         
         # 2nd motor  
         self.in3 = 19
         self.in4 = 26
         self.enb = 13
         
-        # GPIO setup
-        GPIO.setmode(GPIO.BCM)
-        GPIO.setup(self.in1, GPIO.OUT)
-        GPIO.setup(self.in2, GPIO.OUT)
-        GPIO.setup(self.in3, GPIO.OUT)
-        GPIO.setup(self.in4, GPIO.OUT)
-        GPIO.setup(self.ena, GPIO.OUT)
-        GPIO.setup(self.enb, GPIO.OUT)
-        
-        # Initialize all outputs to LOW
-        GPIO.output(self.in1, GPIO.LOW)
-        GPIO.output(self.in2, GPIO.LOW)
-        GPIO.output(self.in3, GPIO.LOW)
-        GPIO.output(self.in4, GPIO.LOW)
-        
-        # PWM setup
-        self.pwm_a = GPIO.PWM(self.ena, 1000)
-        self.pwm_b = GPIO.PWM(self.enb, 1000)
-        self.pwm_a.start(0)
-        self.pwm_b.start(0)
+        # Backend selection for direction writes, fastest first: a local
+        # motor daemon over MOTOR_SOCKET, then the pigpio daemon (one
+        # socket message flips the whole bank), then direct /dev/gpiomem
+        # register writes, then per-pin RPi.GPIO.
+        self._sock = None
+        self._pi = None
+        self._gpiomem = None
+        all_direction_pins = ((1 << self.in1) | (1 << self.in2) |
+                              (1 << self.in3) | (1 << self.in4))
+
+        if os.path.exists(MOTOR_SOCKET):
+            try:
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+                sock.connect(MOTOR_SOCKET)
+                self._sock = sock
+            except OSError:
+                self._sock = None
+        # Last (direction, speed) datagram sent; _send_packet drops
+        # exact repeats so each state change is exactly one write
+        self._last_packet = None
+
+        if self._sock is None and pigpio is not None:
+            pi = pigpio.pi()
+            if pi.connected:
+                self._pi = pi
+                for pin in (self.in1, self.in2, self.in3, self.in4):
+                    pi.set_mode(pin, pigpio.OUTPUT)
+                pi.clear_bank_1(all_direction_pins)
+            else:
+                pi.stop()
+
+        if self._sock is None and self._pi is None:
+            # GPIO setup
+            GPIO.setmode(GPIO.BCM)
+            GPIO.setup(self.in1, GPIO.OUT)
+            GPIO.setup(self.in2, GPIO.OUT)
+            GPIO.setup(self.in3, GPIO.OUT)
+            GPIO.setup(self.in4, GPIO.OUT)
+
+            # Initialize all outputs to LOW
+            GPIO.output(self.in1, GPIO.LOW)
+            GPIO.output(self.in2, GPIO.LOW)
+            GPIO.output(self.in3, GPIO.LOW)
+            GPIO.output(self.in4, GPIO.LOW)
+
+            # Direct register fast path for direction changes: all four
+            # direction pins live in GPIO bank 0, so one write to GPSET0
+            # and one to GPCLR0 replace four library-mediated pin updates.
+            # The pins are already configured as outputs by GPIO.setup
+            # above. Falls back to per-pin GPIO.output when /dev/gpiomem
+            # is absent.
+            try:
+                fd = os.open("/dev/gpiomem", os.O_RDWR | os.O_SYNC)
+                try:
+                    self._gpiomem = mmap.mmap(fd, 4096)
+                finally:
+                    os.close(fd)
+            except OSError:
+                self._gpiomem = None
+
+        # (pins_high, pins_low) per direction for the RPi.GPIO fallback -
+        # the list form of GPIO.output is one C-level call per group
+        self._direction_pins = {
+            "FORWARD": ([self.in1, self.in3], [self.in2, self.in4]),
+            "BACKWARD": ([self.in2, self.in4], [self.in1, self.in3]),
+            "LEFT": ([self.in2, self.in3], [self.in1, self.in4]),
+            "RIGHT": ([self.in1, self.in4], [self.in2, self.in3]),
+            "STOPPED": ([], [self.in1, self.in2, self.in3, self.in4]),
+        }
+
+        # Precomputed (set_mask, clear_mask) per direction
+        self._direction_masks = {
+            "FORWARD": ((1 << self.in1) | (1 << self.in3),
+                        (1 << self.in2) | (1 << self.in4)),
+            "BACKWARD": ((1 << self.in2) | (1 << self.in4),
+                         (1 << self.in1) | (1 << self.in3)),
+            "LEFT": ((1 << self.in2) | (1 << self.in3),
+                     (1 << self.in1) | (1 << self.in4)),
+            "RIGHT": ((1 << self.in1) | (1 << self.in4),
+                      (1 << self.in2) | (1 << self.in3)),
+            "STOPPED": (0, (1 << self.in1) | (1 << self.in2) |
+                        (1 << self.in3) | (1 << self.in4)),
+        }
+
+        # PWM setup - pigpio's DMA-timed PWM when connected, then the
+        # sysfs hardware channels, then RPi.GPIO software PWM
+        self.pwm_a = None
+        self.pwm_b = None
+        self._pwm_files = []
+        if self._sock is not None:
+            # The daemon owns PWM; speed rides in the direction datagram
+            self._duty_a = self._duty_b = lambda percent: None
+        elif self._pi is not None:
+            self._pi.set_PWM_frequency(self.ena, 1000)
+            self._pi.set_PWM_frequency(self.enb, 1000)
+
+            # pigpio duty is 0-255; the setters keep the 0-100 interface
+            def set_duty(percent, _pin=self.ena, _pi=self._pi):
+                _pi.set_PWM_dutycycle(_pin, int(percent) * 255 // 100)
+
+            def set_duty_b(percent, _pin=self.enb, _pi=self._pi):
+                _pi.set_PWM_dutycycle(_pin, int(percent) * 255 // 100)
+
+            self._duty_a = set_duty
+            self._duty_b = set_duty_b
+        else:
+            hw_setters = self._init_hw_pwm()
+            if hw_setters is not None:
+                self._duty_a, self._duty_b = hw_setters
+            else:
+                GPIO.setup(self.ena, GPIO.OUT)
+                GPIO.setup(self.enb, GPIO.OUT)
+                self.pwm_a = GPIO.PWM(self.ena, 1000)
+                self.pwm_b = GPIO.PWM(self.enb, 1000)
+                self.pwm_a.start(0)
+                self.pwm_b.start(0)
+
+                # Bind the duty-cycle setters once - skips two attribute
+                # descents per PWM update on the hot path
+                self._duty_a = self.pwm_a.ChangeDutyCycle
+                self._duty_b = self.pwm_b.ChangeDutyCycle
         
         # State tracking
         self.current_speed = 50  # 0-100 percent
+        self.current_speed_percent = 50  # same value; shared status name
         self.current_direction = "STOPPED"
-        self.is_moving = False
-        
-    def set_speed(self, speed_percent):
-        """Set motor speed as percentage (0-100)"""
+
+        self._stop_timer = None  # pending timed stop from the legacy API
+
+        # Reused status dict - refreshed in place by get_status so a
+        # polling loop doesn't allocate a new dict per call
+        self._status = {
+            "speed_percent": 50,
+            "direction": "STOPPED",
+            "is_moving": False,
+        }
+
+    def _send_packet(self, direction, speed):
+        """Send one (direction, speed) datagram to the motor daemon.
+
+        Identical back-to-back packets are dropped: the start_* methods
+        reach here via both _apply_direction and _update_pwm, and the
+        daemon only needs the state once.
+        """
+        packet = (direction, speed)
+        if packet == self._last_packet:
+            return
+        try:
+            self._sock.send(bytes((_DIRECTION_CODES[direction], speed)))
+            self._last_packet = packet
+        except OSError as e:
+            print(f"Motor daemon write failed: {e}")
+
+    def _write_registers(self, direction):
+        """Flip all four direction pins with two register stores"""
+        set_mask, clr_mask = self._direction_masks[direction]
+        if clr_mask:
+            struct.pack_into('<I', self._gpiomem, GPCLR0, clr_mask)
+        if set_mask:
+            struct.pack_into('<I', self._gpiomem, GPSET0, set_mask)
+
+    def _init_hw_pwm(self):
+        """Set up the sysfs hardware PWM channels, returning two duty setters.
+
+        The duty_cycle file handles are kept open for the lifetime of the
+        controller so each update is just a seek + write. Returns None when
+        the PWM chip is missing (no overlay, not a Pi, no permissions).
+        """
+        try:
+            setters = []
+            for channel in (0, 1):
+                channel_dir = f"{PWM_CHIP}/pwm{channel}"
+                if not os.path.isdir(channel_dir):
+                    with open(f"{PWM_CHIP}/export", 'w') as f:
+                        f.write(str(channel))
+                with open(f"{channel_dir}/period", 'w') as f:
+                    f.write(str(PWM_PERIOD_NS))
+                duty_file = open(f"{channel_dir}/duty_cycle", 'wb', buffering=0)
+                self._pwm_files.append(duty_file)
+                with open(f"{channel_dir}/enable", 'w') as f:
+                    f.write("1")
+
+                def set_duty(percent, _f=duty_file):
+                    _f.seek(0)
+                    _f.write(str(int(percent) * (PWM_PERIOD_NS // 100)).encode())
+
+                setters.append(set_duty)
+            return setters
+        except OSError:
+            for duty_file in self._pwm_files:
+                duty_file.close()
+            self._pwm_files = []
+            return None
+
+    def _apply_direction(self, direction):
+        """Drive all four direction pins for the given direction"""
+        if self._sock is not None:
+            self._send_packet(direction, int(self.current_speed))
+            return
+        if self._pi is not None:
+            set_mask, clr_mask = self._direction_masks[direction]
+            if clr_mask:
+                self._pi.clear_bank_1(clr_mask)
+            if set_mask:
+                self._pi.set_bank_1(set_mask)
+            return
+        if self._gpiomem is not None:
+            self._write_registers(direction)
+            return
+        pins_high, pins_low = self._direction_pins[direction]
+        if pins_high:
+            _output(pins_high, _HIGH)
+        _output(pins_low, _LOW)
+
+    def _update_pwm(self):
+        """Apply the current speed to both PWM channels"""
+        if self._sock is not None:
+            self._send_packet(self.current_direction, int(self.current_speed))
+            return
+        self._duty_a(self.current_speed)
+        self._duty_b(self.current_speed)
+
+    def set_speed(self, speed_percent, apply=True):
+        """Set motor speed as percentage (0-100).
+
+        start_* callers pass apply=False because they issue exactly one
+        PWM write themselves after setting the direction pins.
+        """
         if speed_percent < 0:
             speed_percent = 0
         elif speed_percent > 100:
             speed_percent = 100
-            
+
         self.current_speed = speed_percent
-        
+        self.current_speed_percent = speed_percent
+
         # Apply new speed to PWM if currently moving
-        if self.is_moving:
-            self.pwm_a.ChangeDutyCycle(self.current_speed)
-            self.pwm_b.ChangeDutyCycle(self.current_speed)
+        if apply and self.is_moving:
+            self._update_pwm()
             
     def start_forward(self, speed_percent=50):
         """Start moving forward at specified speed"""
-        self.set_speed(speed_percent)
+        self.set_speed(speed_percent, apply=False)
         self.current_direction = "FORWARD"
-        self.is_moving = True
         
-        GPIO.output(self.in1, GPIO.HIGH)
-        GPIO.output(self.in2, GPIO.LOW)
-        GPIO.output(self.in3, GPIO.HIGH)
-        GPIO.output(self.in4, GPIO.LOW)
-        self.pwm_a.ChangeDutyCycle(self.current_speed)
-        self.pwm_b.ChangeDutyCycle(self.current_speed)
+        self._apply_direction("FORWARD")
+        self._update_pwm()
         
     def start_backward(self, speed_percent=50):
         """Start moving backward at specified speed"""
-        self.set_speed(speed_percent)
+        self.set_speed(speed_percent, apply=False)
         self.current_direction = "BACKWARD"
-        self.is_moving = True
         
-        GPIO.output(self.in1, GPIO.LOW)
-        GPIO.output(self.in2, GPIO.HIGH)
-        GPIO.output(self.in3, GPIO.LOW)
-        GPIO.output(self.in4, GPIO.HIGH)
-        self.pwm_a.ChangeDutyCycle(self.current_speed)
-        self.pwm_b.ChangeDutyCycle(self.current_speed)
+        self._apply_direction("BACKWARD")
+        self._update_pwm()
         
     def start_left(self, speed_percent=50):
         """Start turning left at specified speed"""
-        self.set_speed(speed_percent)
+        self.set_speed(speed_percent, apply=False)
         self.current_direction = "LEFT"
-        self.is_moving = True
         
-        GPIO.output(self.in1, GPIO.LOW)
-        GPIO.output(self.in2, GPIO.HIGH)
-        GPIO.output(self.in3, GPIO.HIGH)
-        GPIO.output(self.in4, GPIO.LOW)
-        self.pwm_a.ChangeDutyCycle(self.current_speed)
-        self.pwm_b.ChangeDutyCycle(self.current_speed)
+        self._apply_direction("LEFT")
+        self._update_pwm()
         
     def start_right(self, speed_percent=50):
         """Start turning right at specified speed"""
-        self.set_speed(speed_percent)
+        self.set_speed(speed_percent, apply=False)
         self.current_direction = "RIGHT"
-        self.is_moving = True
         
-        GPIO.output(self.in1, GPIO.HIGH)
-        GPIO.output(self.in2, GPIO.LOW)
-        GPIO.output(self.in3, GPIO.LOW)
-        GPIO.output(self.in4, GPIO.HIGH)
-        self.pwm_a.ChangeDutyCycle(self.current_speed)
-        self.pwm_b.ChangeDutyCycle(self.current_speed)
+        self._apply_direction("RIGHT")
+        self._update_pwm()
         
     def stop(self):
         """Stop all motors immediately"""
-        GPIO.output(self.in1, GPIO.LOW)
-        GPIO.output(self.in2, GPIO.LOW)
-        GPIO.output(self.in3, GPIO.LOW)
-        GPIO.output(self.in4, GPIO.LOW)
-        self.pwm_a.ChangeDutyCycle(0)
-        self.pwm_b.ChangeDutyCycle(0)
+        if self._stop_timer is not None:
+            self._stop_timer.cancel()
+            self._stop_timer = None
+        self._apply_direction("STOPPED")
+        self._duty_a(0)
+        self._duty_b(0)
         self.current_direction = "STOPPED"
-        self.is_moving = False
         
+    @property
+    def is_moving(self):
+        """Movement is implied by a non-STOPPED direction"""
+        return self.current_direction != "STOPPED"
+
     def get_status(self):
         """Return current motor status"""
-        return {
-            "speed_percent": self.current_speed,
-            "direction": self.current_direction,
-            "is_moving": self.is_moving
-        }
+        status = self._status
+        status["speed_percent"] = self.current_speed_percent
+        status["direction"] = self.current_direction
+        status["is_moving"] = self.is_moving
+        return status
         
     def cleanup(self):
         """Safe shutdown of motor controller"""
         self.stop()
-        self.pwm_a.stop()
-        self.pwm_b.stop()
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+            return
+        if self._pi is not None:
+            self._pi.stop()
+            self._pi = None
+            return
+        if self._pwm_files:
+            for duty_file in self._pwm_files:
+                duty_file.close()
+            self._pwm_files = []
+        else:
+            self.pwm_a.stop()
+            self.pwm_b.stop()
+        if self._gpiomem is not None:
+            self._gpiomem.close()
+            self._gpiomem = None
         GPIO.cleanup()
         
     # Speed presets for compatibility
@@ -148,39 +389,36 @@ class L298Controller:
         """Set speed to 75%"""
         self.set_speed(75)
         
+
+    def _schedule_stop(self, duration):
+        """Arm a timer that stops the motors after the given delay"""
+        if self._stop_timer is not None:
+            self._stop_timer.cancel()
+        self._stop_timer = threading.Timer(duration, self.stop)
+        self._stop_timer.daemon = True
+        self._stop_timer.start()
+
     # Legacy functions for backward compatibility (deprecated)
     def forward(self, duration=0):
         """Legacy function - use start_forward() instead"""
+        self.start_forward()
         if duration > 0:
-            self.start_forward()
-            time.sleep(duration)
-            self.stop()
-        else:
-            self.start_forward()
+            self._schedule_stop(duration)
             
     def backward(self, duration=0):
         """Legacy function - use start_backward() instead"""
+        self.start_backward()
         if duration > 0:
-            self.start_backward()
-            time.sleep(duration)
-            self.stop()
-        else:
-            self.start_backward()
+            self._schedule_stop(duration)
             
     def left(self, duration=0):
         """Legacy function - use start_left() instead"""
+        self.start_left()
         if duration > 0:
-            self.start_left()
-            time.sleep(duration)
-            self.stop()
-        else:
-            self.start_left()
+            self._schedule_stop(duration)
             
     def right(self, duration=0):
         """Legacy function - use start_right() instead"""
+        self.start_right()
         if duration > 0:
-            self.start_right()
-            time.sleep(duration)
-            self.stop()
-        else:
-            self.start_right()
+            self._schedule_stop(duration)
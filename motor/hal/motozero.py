@@ -2,33 +2,145 @@
 # Enhanced MotoZero HAL with continuous control and speed management
 
 from gpiozero import Motor, OutputDevice
-import time
+import threading
+
+# pigpio is optional; when its daemon is running we skip gpiozero's
+# per-pin object layer and drive all eight direction pins through one
+# shared connection with bank-wide writes
+try:
+    import pigpio
+except ImportError:
+    pigpio = None
+
+
+def _specialize_movement(fn_a, fn_b, fn_c, fn_d):
+    """Build a straight-line applier over four bound motor methods.
+
+    The closure freezes the wiring chosen at init time, so applying a
+    direction is four direct calls with no tuple iteration.
+    """
+    def apply(speed):
+        fn_a(speed)
+        fn_b(speed)
+        fn_c(speed)
+        fn_d(speed)
+    return apply
+
+
+def _pin_mask(pins):
+    """Build a bank-0 bitmask covering the given BCM pins"""
+    mask = 0
+    for pin in pins:
+        mask |= 1 << pin
+    return mask
+
 
 class MotoZeroController:
+    # Clamped percent -> float speed; indexing replaces a float division
+    # per set_speed call and pins the set of representable speeds
+    _SPEED_LUT = tuple(i / 100.0 for i in range(101))
+
     def __init__(self):
-        # MotoZero motor pin configuration
-        self.motorRR = Motor(24, 27)
-        self.motorRR_enable = OutputDevice(5, initial_value=1)
-        self.motorFR = Motor(6, 22)
-        self.motorFR_enable = OutputDevice(17, initial_value=1)
-        self.motorFL = Motor(23, 16)
-        self.motorFL_enable = OutputDevice(12, initial_value=1)
-        self.motorRL = Motor(13, 18)
-        self.motorRL_enable = OutputDevice(25, initial_value=1)
+        # MotoZero motor pin configuration: (forward, backward) per motor
+        # plus an always-high enable pin each
+        # RR=(24,27)/en5  FR=(6,22)/en17  FL=(23,16)/en12  RL=(13,18)/en25
+        self._pi = None
+        if pigpio is not None:
+            pi = pigpio.pi()
+            if pi.connected:
+                self._pi = pi
+            else:
+                pi.stop()
+
+        if self._pi is not None:
+            # One shared daemon connection instead of four Motor and four
+            # OutputDevice objects; a direction change is one bank clear
+            # plus four PWM writes instead of eight gpiozero pin updates.
+            forward_pins = (6, 23, 13, 24)   # FR, FL, RL, RR
+            backward_pins = (22, 16, 18, 27)
+            left_pins = (22, 23, 13, 27)     # FR back, FL/RL fwd, RR back
+            right_pins = (6, 16, 18, 24)     # FR fwd, FL/RL back, RR fwd
+            enable_pins = (17, 12, 25, 5)
+
+            for pin in forward_pins + backward_pins:
+                self._pi.set_mode(pin, pigpio.OUTPUT)
+            for pin in enable_pins:
+                self._pi.set_mode(pin, pigpio.OUTPUT)
+                self._pi.write(pin, 1)
+
+            # The bank clear is only safe here, before any pin has been
+            # put in PWM mode: pigpio bank writes are raw register
+            # stores and do not cancel an active PWM waveform
+            self._all_direction_pins = forward_pins + backward_pins
+            self._pi.clear_bank_1(_pin_mask(self._all_direction_pins))
+
+            # direction -> (pins to PWM, the opposite pins to force
+            # idle). Both sides go through set_PWM_dutycycle - only
+            # that (or write) stops or overrides a running waveform.
+            self._dir_table = {
+                "FORWARD": (forward_pins, backward_pins),
+                "BACKWARD": (backward_pins, forward_pins),
+                "LEFT": (left_pins, right_pins),
+                "RIGHT": (right_pins, left_pins),
+            }
+        else:
+            self.motorRR = Motor(24, 27)
+            self.motorRR_enable = OutputDevice(5, initial_value=1)
+            self.motorFR = Motor(6, 22)
+            self.motorFR_enable = OutputDevice(17, initial_value=1)
+            self.motorFL = Motor(23, 16)
+            self.motorFL_enable = OutputDevice(12, initial_value=1)
+            self.motorRL = Motor(13, 18)
+            self.motorRL_enable = OutputDevice(25, initial_value=1)
+
+            # direction -> tuple of bound motor methods; one dict lookup
+            # replaces the old if/elif ladder in _apply_current_movement
+            self._actions = {
+                "FORWARD": (self.motorFR.forward, self.motorFL.forward,
+                            self.motorRL.forward, self.motorRR.forward),
+                "BACKWARD": (self.motorFR.backward, self.motorFL.backward,
+                             self.motorRL.backward, self.motorRR.backward),
+                "LEFT": (self.motorFR.backward, self.motorFL.forward,
+                         self.motorRL.forward, self.motorRR.backward),
+                "RIGHT": (self.motorFR.forward, self.motorFL.backward,
+                          self.motorRL.backward, self.motorRR.forward),
+            }
+            # Each direction gets its own specialized applier closed
+            # over the bound methods above
+            self._appliers = {
+                direction: _specialize_movement(*fns)
+                for direction, fns in self._actions.items()
+            }
+
+            # Bound once here so stop() skips four attribute descents
+            self._all_stop = (self.motorFR.stop, self.motorFL.stop,
+                              self.motorRL.stop, self.motorRR.stop)
         
         # State tracking
         self.current_speed = 0.0  # 0.0 to 1.0
+        self.current_speed_percent = 0  # int mirror for status reporting
         self.current_direction = "STOPPED"  # FORWARD, BACKWARD, LEFT, RIGHT, STOPPED
-        self.is_moving = False
+
+        self._stop_timer = None  # pending timed stop from the legacy API
+
+        # Reused status dict - refreshed in place by get_status so a
+        # polling loop doesn't allocate a new dict per call
+        self._status = {
+            "speed_percent": 0,
+            "direction": "STOPPED",
+            "is_moving": False,
+        }
         
     def set_speed(self, speed_percent):
         """Set motor speed as percentage (0-100)"""
+        speed_percent = int(speed_percent)
         if speed_percent < 0:
             speed_percent = 0
         elif speed_percent > 100:
             speed_percent = 100
             
-        self.current_speed = speed_percent / 100.0
+        self.current_speed_percent = speed_percent
+        self.current_speed = self._SPEED_LUT[speed_percent]
         
         # If currently moving, apply new speed immediately
         if self.is_moving:
@@ -38,108 +150,115 @@ class MotoZeroController:
         """Start moving forward at specified speed"""
         self.set_speed(speed_percent)
         self.current_direction = "FORWARD"
-        self.is_moving = True
         self._apply_current_movement()
         
     def start_backward(self, speed_percent=50):
         """Start moving backward at specified speed"""
         self.set_speed(speed_percent)
         self.current_direction = "BACKWARD"
-        self.is_moving = True
         self._apply_current_movement()
         
     def start_left(self, speed_percent=50):
         """Start turning left at specified speed"""
         self.set_speed(speed_percent)
         self.current_direction = "LEFT"
-        self.is_moving = True
         self._apply_current_movement()
         
     def start_right(self, speed_percent=50):
         """Start turning right at specified speed"""
         self.set_speed(speed_percent)
         self.current_direction = "RIGHT"
-        self.is_moving = True
         self._apply_current_movement()
         
     def stop(self):
         """Stop all motors immediately"""
-        self.motorFR.stop()
-        self.motorFL.stop()
-        self.motorRL.stop()
-        self.motorRR.stop()
+        if self._stop_timer is not None:
+            self._stop_timer.cancel()
+            self._stop_timer = None
+        if self._pi is not None:
+            # set_PWM_dutycycle(0) per pin, not a bank clear: a bank
+            # write would leave any active PWM waveform running and the
+            # motors would never stop
+            for pin in self._all_direction_pins:
+                self._pi.set_PWM_dutycycle(pin, 0)
+        else:
+            for stop_fn in self._all_stop:
+                stop_fn()
         self.current_direction = "STOPPED"
-        self.is_moving = False
         
     def _apply_current_movement(self):
         """Apply current direction and speed to motors"""
-        if self.current_direction == "FORWARD":
-            self.motorFR.forward(self.current_speed)
-            self.motorFL.forward(self.current_speed)
-            self.motorRL.forward(self.current_speed)
-            self.motorRR.forward(self.current_speed)
-        elif self.current_direction == "BACKWARD":
-            self.motorFR.backward(self.current_speed)
-            self.motorFL.backward(self.current_speed)
-            self.motorRL.backward(self.current_speed)
-            self.motorRR.backward(self.current_speed)
-        elif self.current_direction == "LEFT":
-            self.motorFR.backward(self.current_speed)
-            self.motorFL.forward(self.current_speed)
-            self.motorRL.forward(self.current_speed)
-            self.motorRR.backward(self.current_speed)
-        elif self.current_direction == "RIGHT":
-            self.motorFR.forward(self.current_speed)
-            self.motorFL.backward(self.current_speed)
-            self.motorRL.backward(self.current_speed)
-            self.motorRR.forward(self.current_speed)
+        if self._pi is not None:
+            pwm_pins, idle_pins = self._dir_table.get(
+                self.current_direction, ((), ()))
+            if not pwm_pins:
+                return
+            # Release the opposite pins via the PWM path so a waveform
+            # left over from the previous direction actually stops
+            for pin in idle_pins:
+                self._pi.set_PWM_dutycycle(pin, 0)
+            # Duty 255 is constant high, so full speed needs no special
+            # case - and a bank set could not override an ongoing
+            # partial-speed waveform anyway
+            duty = int(self.current_speed * 255)
+            for pin in pwm_pins:
+                self._pi.set_PWM_dutycycle(pin, duty)
+            return
+        apply_fn = self._appliers.get(self.current_direction)
+        if apply_fn is not None:
+            apply_fn(self.current_speed)
             
+    @property
+    def is_moving(self):
+        """Movement is implied by a non-STOPPED direction"""
+        return self.current_direction != "STOPPED"
+
     def get_status(self):
         """Return current motor status"""
-        return {
-            "speed_percent": int(self.current_speed * 100),
-            "direction": self.current_direction,
-            "is_moving": self.is_moving
-        }
+        status = self._status
+        status["speed_percent"] = self.current_speed_percent
+        status["direction"] = self.current_direction
+        status["is_moving"] = self.is_moving
+        return status
         
     def cleanup(self):
         """Safe shutdown of motor controller"""
         self.stop()
+        if self._pi is not None:
+            self._pi.stop()
+            self._pi = None
         # Additional cleanup if needed
         
+
+    def _schedule_stop(self, duration):
+        """Arm a timer that stops the motors after the given delay"""
+        if self._stop_timer is not None:
+            self._stop_timer.cancel()
+        self._stop_timer = threading.Timer(duration, self.stop)
+        self._stop_timer.daemon = True
+        self._stop_timer.start()
+
     # Legacy functions for backward compatibility (deprecated)
     def forward(self, duration=0):
         """Legacy function - use start_forward() instead"""
+        self.start_forward()
         if duration > 0:
-            self.start_forward()
-            time.sleep(duration)
-            self.stop()
-        else:
-            self.start_forward()
+            self._schedule_stop(duration)
             
     def backward(self, duration=0):
         """Legacy function - use start_backward() instead"""
+        self.start_backward()
         if duration > 0:
-            self.start_backward()
-            time.sleep(duration)
-            self.stop()
-        else:
-            self.start_backward()
+            self._schedule_stop(duration)
             
     def left(self, duration=0):
         """Legacy function - use start_left() instead"""
+        self.start_left()
         if duration > 0:
-            self.start_left()
-            time.sleep(duration)
-            self.stop()
-        else:
-            self.start_left()
+            self._schedule_stop(duration)
             
     def right(self, duration=0):
         """Legacy function - use start_right() instead"""
+        self.start_right()
         if duration > 0:
-            self.start_right()
-            time.sleep(duration)
-            self.stop()
-        else:
-            self.start_right()
+            self._schedule_stop(duration)
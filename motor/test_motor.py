@@ -1,21 +1,42 @@
 # motor/test_motor.py
 # Test script for motor HAL functions
 
+import asyncio
+import importlib
+import select
 import time
 import sys
-import json
+
+# orjson parses several times faster than stdlib json when installed;
+# both take the raw bytes so the file is opened in binary mode
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
 
 # Dynamic HAL imports - only import what we need
 
+# Controllers already constructed this run, keyed by type. Re-creating
+# one would repeat the whole GPIO/pigpio init cycle for no benefit.
+_CONTROLLER_CACHE = {}
+
+# Interactive mode stops the motors after this long without a command
+WATCHDOG_TIMEOUT = 5.0
+
+_config_cache = None
+
 def load_config():
-    """Load motor configuration"""
+    """Load motor configuration (parsed once and cached)"""
+    global _config_cache
+    if _config_cache is not None:
+        return _config_cache
     try:
-        with open("motor_config.json", 'r') as f:
-            config = json.load(f)
-        return config
+        with open("motor_config.json", 'rb') as f:
+            _config_cache = _json_loads(f.read())
     except FileNotFoundError:
         print("motor_config.json not found, using default controller")
-        return {"motor_controller": {"type": "motozero"}}
+        _config_cache = {"motor_controller": {"type": "motozero"}}
+    return _config_cache
 
 def create_motor_controller(controller_type):
     """Dynamically import and create appropriate motor controller"""
@@ -31,23 +52,29 @@ def create_motor_controller(controller_type):
     if controller_type not in controller_map:
         print(f"Unknown controller type: {controller_type}, defaulting to MotoZero")
         controller_type = "motozero"
-        
+
+    cached = _CONTROLLER_CACHE.get(controller_type)
+    if cached is not None:
+        return cached
+
     module_name, class_name = controller_map[controller_type]
     
     try:
         # Import only the needed HAL module
-        module = __import__(f"hal.{module_name}", fromlist=[class_name])
+        module = importlib.import_module(f"hal.{module_name}")
         controller_class = getattr(module, class_name)
         
         print(f"Testing {class_name}")
-        return controller_class()
+        controller = controller_class()
+        _CONTROLLER_CACHE[controller_type] = controller
+        return controller
         
     except ImportError as e:
         print(f"Could not import {module_name}: {e}")
         print("Make sure you're running from motor directory with proper hardware.")
         sys.exit(1)
 
-def test_basic_movements(motor):
+async def test_basic_movements(motor):
     """Test basic movement functions"""
     print("\n=== Testing Basic Movements ===")
     
@@ -55,37 +82,37 @@ def test_basic_movements(motor):
     print("Testing forward movement...")
     motor.start_forward(50)
     print(f"Status: {motor.get_status()}")
-    time.sleep(2)
+    await asyncio.sleep(2)
     motor.stop()
-    time.sleep(1)
+    await asyncio.sleep(1)
     
     # Test backward
     print("Testing backward movement...")
     motor.start_backward(50)
     print(f"Status: {motor.get_status()}")
-    time.sleep(2)
+    await asyncio.sleep(2)
     motor.stop()
-    time.sleep(1)
+    await asyncio.sleep(1)
     
     # Test left turn
     print("Testing left turn...")
     motor.start_left(40)
     print(f"Status: {motor.get_status()}")
-    time.sleep(1)
+    await asyncio.sleep(1)
     motor.stop()
-    time.sleep(1)
+    await asyncio.sleep(1)
     
     # Test right turn
     print("Testing right turn...")
     motor.start_right(40)
     print(f"Status: {motor.get_status()}")
-    time.sleep(1)
+    await asyncio.sleep(1)
     motor.stop()
-    time.sleep(1)
+    await asyncio.sleep(1)
     
     print("Basic movement tests completed.")
 
-def test_speed_control(motor):
+async def test_speed_control(motor):
     """Test speed control functions"""
     print("\n=== Testing Speed Control ===")
     
@@ -96,29 +123,29 @@ def test_speed_control(motor):
         print(f"Testing forward at {speed}% speed...")
         motor.start_forward(speed)
         print(f"Status: {motor.get_status()}")
-        time.sleep(1.5)
+        await asyncio.sleep(1.5)
         motor.stop()
-        time.sleep(1)
+        await asyncio.sleep(1)
     
     # Test speed change while moving
     print("Testing speed change while moving...")
     motor.start_forward(30)
-    time.sleep(1)
+    await asyncio.sleep(1)
     
     print("Increasing speed to 60%...")
     motor.set_speed(60)
     print(f"Status: {motor.get_status()}")
-    time.sleep(1)
+    await asyncio.sleep(1)
     
     print("Increasing speed to 90%...")
     motor.set_speed(90)
     print(f"Status: {motor.get_status()}")
-    time.sleep(1)
+    await asyncio.sleep(1)
     
     motor.stop()
     print("Speed control tests completed.")
 
-def test_continuous_movement(motor):
+async def test_continuous_movement(motor):
     """Test continuous movement (no automatic stopping)"""
     print("\n=== Testing Continuous Movement ===")
     
@@ -127,7 +154,7 @@ def test_continuous_movement(motor):
     
     print("Movement should continue... waiting 3 seconds")
     for i in range(3):
-        time.sleep(1)
+        await asyncio.sleep(1)
         print(f"Status: {motor.get_status()}")
     
     print("Manually stopping...")
@@ -136,7 +163,7 @@ def test_continuous_movement(motor):
     
     print("Continuous movement test completed.")
 
-def test_status_reporting(motor):
+async def test_status_reporting(motor):
     """Test status reporting"""
     print("\n=== Testing Status Reporting ===")
     
@@ -159,20 +186,20 @@ def test_status_reporting(motor):
     
     print("Status reporting tests completed.")
 
-def test_legacy_functions(motor):
+async def test_legacy_functions(motor):
     """Test legacy functions for backward compatibility"""
     print("\n=== Testing Legacy Functions ===")
     
     # Test legacy forward (should work like old version)
     print("Testing legacy forward() with duration...")
     motor.forward(1)  # Should move forward for 1 second then stop
-    time.sleep(0.5)
+    await asyncio.sleep(0.5)
     print(f"Status after legacy forward: {motor.get_status()}")
     
     # Test legacy functions without duration (continuous)
     print("Testing legacy forward() without duration...")
     motor.forward()  # Should start moving forward continuously
-    time.sleep(2)
+    await asyncio.sleep(2)
     motor.stop()
     
     print("Legacy function tests completed.")
@@ -189,32 +216,51 @@ def interactive_test(motor):
     print("  speed N   - Set speed to N%")
     print("  status    - Show status")
     print("  q         - Quit")
-    
+    print(f"Motors auto-stop after {WATCHDOG_TIMEOUT:.0f}s without a command.")
+    
+    # Command -> (bound method, label) table; dispatch is one dict
+    # lookup instead of walking an if/elif chain per command
+    movements = {
+        'f': (motor.start_forward, "forward"),
+        'b': (motor.start_backward, "backward"),
+        'l': (motor.start_left, "left"),
+        'r': (motor.start_right, "right"),
+    }
+
+    last_cmd_time = time.monotonic()
+    print("Enter command: ", end="", flush=True)
     while True:
         try:
-            cmd = input("Enter command: ").strip().lower().split()
+            # Poll stdin instead of blocking in input() so the watchdog
+            # keeps running while the user is idle or typing
+            readable, _, _ = select.select([sys.stdin], [], [], 0.1)
+            if not readable:
+                if (motor.is_moving and
+                        time.monotonic() - last_cmd_time > WATCHDOG_TIMEOUT):
+                    motor.stop()
+                    print("\nWatchdog: no command received, motors stopped")
+                    print("Enter command: ", end="", flush=True)
+                continue
+
+            line = sys.stdin.readline()
+            if not line:
+                break
+            last_cmd_time = time.monotonic()
+            cmd = line.strip().lower().split()
             
             if not cmd:
+                print("Enter command: ", end="", flush=True)
                 continue
                 
             if cmd[0] == 'q':
                 break
-            elif cmd[0] == 'f':
-                speed = int(cmd[1]) if len(cmd) > 1 else 50
-                motor.start_forward(speed)
-                print(f"Started forward at {speed}%")
-            elif cmd[0] == 'b':
-                speed = int(cmd[1]) if len(cmd) > 1 else 50
-                motor.start_backward(speed)
-                print(f"Started backward at {speed}%")
-            elif cmd[0] == 'l':
-                speed = int(cmd[1]) if len(cmd) > 1 else 50
-                motor.start_left(speed)
-                print(f"Started left at {speed}%")
-            elif cmd[0] == 'r':
+
+            move = movements.get(cmd[0])
+            if move is not None:
+                start_fn, label = move
                 speed = int(cmd[1]) if len(cmd) > 1 else 50
-                motor.start_right(speed)
-                print(f"Started right at {speed}%")
+                start_fn(speed)
+                print(f"Started {label} at {speed}%")
             elif cmd[0] == 's':
                 motor.stop()
                 print("Stopped")
@@ -226,15 +272,24 @@ def interactive_test(motor):
                 print(f"Status: {motor.get_status()}")
             else:
                 print("Unknown command")
+            print("Enter command: ", end="", flush=True)
                 
         except (ValueError, IndexError):
             print("Invalid command format")
+            print("Enter command: ", end="", flush=True)
         except KeyboardInterrupt:
             break
     
     motor.stop()
     print("Interactive test completed.")
 
+async def _run_all_tests(motor):
+    """Run every scripted test in one event loop"""
+    for test_fn in (test_basic_movements, test_speed_control,
+                    test_continuous_movement, test_status_reporting,
+                    test_legacy_functions):
+        await test_fn(motor)
+
 def main():
     """Main test function"""
     print("Motor HAL Test Script")
@@ -252,6 +307,16 @@ def main():
         print("Make sure you're running on a Raspberry Pi with proper hardware connected.")
         return
     
+    # Menu choice -> test function table, mirroring the interactive
+    # command dispatch
+    tests = {
+        '1': test_basic_movements,
+        '2': test_speed_control,
+        '3': test_continuous_movement,
+        '4': test_status_reporting,
+        '5': test_legacy_functions,
+        '6': interactive_test,
+    }
     # Menu for test selection
     while True:
         print("\nSelect test:")
@@ -269,24 +334,15 @@ def main():
             
             if choice == '0':
                 break
-            elif choice == '1':
-                test_basic_movements(motor)
-            elif choice == '2':
-                test_speed_control(motor)
-            elif choice == '3':
-                test_continuous_movement(motor)
-            elif choice == '4':
-                test_status_reporting(motor)
-            elif choice == '5':
-                test_legacy_functions(motor)
-            elif choice == '6':
-                interactive_test(motor)
+
+            test_fn = tests.get(choice)
+            if test_fn is not None:
+                if asyncio.iscoroutinefunction(test_fn):
+                    asyncio.run(test_fn(motor))
+                else:
+                    test_fn(motor)
             elif choice == '7':
-                test_basic_movements(motor)
-                test_speed_control(motor)
-                test_continuous_movement(motor)
-                test_status_reporting(motor)
-                test_legacy_functions(motor)
+                asyncio.run(_run_all_tests(motor))
             else:
                 print("Invalid choice")
                 
@@ -3,11 +3,53 @@
 # Supports continuous movement and real-time speed control
 
 import paho.mqtt.client as mqtt
+import heapq
+import importlib
 import json
+import logging
+import struct
+from collections import deque
 import time
 import threading
 import sys
 import os
+from types import SimpleNamespace
+# Bound once: monotonic for heartbeat intervals (immune to NTP steps
+# and vDSO-fast), wall time only for human-readable status timestamps
+from time import monotonic as _monotonic, time as _wall_time
+
+log = logging.getLogger("umc")
+
+
+def _cached_import(module_name, item_name):
+    """Fetch an attribute from a module, peeking sys.modules first.
+
+    Already-imported modules are returned without touching the import
+    lock, so re-resolving a HAL (reloads, tests) is a dict lookup.
+    """
+    module = sys.modules.get(module_name)
+    if module is None:
+        module = importlib.import_module(module_name)
+    return getattr(module, item_name)
+
+
+# Unchanged status payloads are suppressed, but a full snapshot goes
+# out every this many cycles as a keepalive
+_STATUS_KEEPALIVE_CYCLES = 30
+
+# Short status key spellings used when "status_compact" is enabled
+_COMPACT_KEYS = {"timestamp": "t", "speed_percent": "s", "direction": "d",
+                 "is_moving": "m", "left_motor_speed": "lm",
+                 "right_motor_speed": "rm"}
+
+# orjson serializes straight to bytes and parses bytes directly, several
+# times faster than stdlib json; fall back transparently when missing
+try:
+    from orjson import dumps as _json_dumps, loads as _json_loads
+except ImportError:
+    def _json_dumps(obj):
+        return json.dumps(obj).encode("utf-8")
+    _json_loads = json.loads
 
 # Dynamic HAL imports - only import what we need
 
@@ -19,6 +61,108 @@ class UniversalMotorController:
         # Initialize motor controller based on config (dynamic import)
         controller_type = self.config["motor_controller"]["type"].lower()
         self.motor_hal = self._create_motor_controller(controller_type)
+
+        # Every config value the runtime actually uses, flattened out of
+        # the nested dict into one namespace: single attribute loads in
+        # the callbacks and one place to see all the tunables
+        raw = self.config
+        self.settings = SimpleNamespace(
+            broker=raw["mqtt"]["broker"],
+            port=raw["mqtt"]["port"],
+            controller_type=raw["motor_controller"]["type"],
+            command_topic=raw["mqtt"]["topics"]["command"],
+            status_topic=raw["mqtt"]["topics"]["status"],
+            default_speed=raw["motor_settings"]["default_speed_percent"],
+            auto_stop_on_disconnect=raw["safety"]["auto_stop_on_disconnect"],
+            heartbeat_timeout=raw["mqtt"]["heartbeat_timeout_seconds"],
+            heartbeat_monitoring=raw["safety"]["heartbeat_monitoring"],
+            status_batch=raw["mqtt"].get("status_batch", 1),
+            # Short status keys keep payloads under one TCP segment but
+            # the controller UI parses the long names, so default off
+            status_compact=raw["mqtt"].get("status_compact", False),
+        )
+
+        # Compact binary command frames arrive on a sub-topic of the
+        # command topic; each frame is 2 bytes: (opcode, speed)
+        self.binary_command_topic = self.settings.command_topic + "/bin"
+
+        # Constant parts of every status message: a pre-serialized JSON
+        # prefix holding the controller type, so publish_status only
+        # encodes the fields that change
+        key = b'"ct":"' if self.settings.status_compact else b'"controller_type":"'
+        self._status_prefix = (b'{' + key +
+                               self.settings.controller_type.encode("utf-8") +
+                               b'",')
+
+        # Delta-suppression state for publish_status
+        self._last_status_hash = None
+        self._cycles_since_full = 0
+
+        # Command dispatch table: uppercased token -> (handler, message).
+        # Handlers all take the parsed speed value; the ones that don't
+        # need it just ignore it. Replaces the old if/elif chain.
+        hal = self.motor_hal
+        dispatch = {
+            "START_FORWARD": (hal.start_forward, "Started forward at %s%% speed"),
+            "FORWARD": (hal.start_forward, "Started forward at %s%% speed"),
+            "START_BACKWARD": (hal.start_backward, "Started backward at %s%% speed"),
+            "BACKWARD": (hal.start_backward, "Started backward at %s%% speed"),
+            "START_LEFT": (hal.start_left, "Started left turn at %s%% speed"),
+            "LEFT": (hal.start_left, "Started left turn at %s%% speed"),
+            "START_RIGHT": (hal.start_right, "Started right turn at %s%% speed"),
+            "RIGHT": (hal.start_right, "Started right turn at %s%% speed"),
+            "STOP": (lambda value: hal.stop(), "Motors stopped"),
+            "SPEED": (hal.set_speed, "Speed changed to %s%%"),
+            "STATUS": (lambda value: self.publish_status(force=True), None),
+            "EMERGENCY_STOP": (lambda value: hal.stop(), "EMERGENCY STOP activated"),
+            "E_STOP": (lambda value: hal.stop(), "EMERGENCY STOP activated"),
+            # Legacy single-character commands for backward compatibility
+            "F": (hal.start_forward, "Started forward (legacy command)"),
+            "B": (hal.start_backward, "Started backward (legacy command)"),
+            "L": (hal.start_left, "Started left turn (legacy command)"),
+            "R": (hal.start_right, "Started right turn (legacy command)"),
+            "S": (lambda value: hal.stop(), "Stopped (legacy command)"),
+        }
+        # Interned keys make lookup of an interned token a pointer
+        # compare; the short spellings are mostly interned already, the
+        # explicit pass guarantees it for every entry
+        self._dispatch = {sys.intern(k): v for k, v in dispatch.items()}
+        self._warmup()
+
+        # 256-slot table indexed by the first payload byte for the
+        # single-letter jog commands many teleop UIs hammer; upper- and
+        # lowercase both land on the handler and everything else falls
+        # through to the line parser
+        self._byte_dispatch = [None] * 256
+        for ch, fn in (("F", self._fwd), ("B", self._back),
+                       ("L", self._left), ("R", self._right),
+                       ("S", lambda value: self._stop())):
+            self._byte_dispatch[ord(ch)] = fn
+            self._byte_dispatch[ord(ch.lower())] = fn
+
+        # Status samples can be buffered and shipped as one JSON array
+        # ("status_batch" in the mqtt config section); the default of 1
+        # keeps today's one-message-per-sample behavior. The deque must
+        # hold a full batch or the flush threshold is never reached.
+        self._status_buffer = deque(maxlen=max(self.settings.status_batch, 1))
+
+        # MQTT client setup
+        self.mqtt_client = mqtt.Client()
+        self.mqtt_client.on_connect = self.on_connect
+        self.mqtt_client.on_message = self.on_message
+        self.mqtt_client.on_disconnect = self.on_disconnect
+        # A wider inflight window keeps bursts of publishes from
+        # serializing behind broker acknowledgements
+        self.mqtt_client.max_inflight_messages_set(20)
+
+        # Heartbeat monitoring: receiving a message just stamps
+        # last_heartbeat; one long-lived timer re-checks the deadline
+        # when it fires, so message traffic never spawns threads
+        self.last_heartbeat = _monotonic()
+        self._hb_timer = None
+
+        # Periodic work
+        self.running = False
         
     def _create_motor_controller(self, controller_type):
         """Dynamically import and create the appropriate motor controller"""
@@ -36,40 +180,40 @@ class UniversalMotorController:
         module_name, class_name = controller_map[controller_type]
         
         try:
-            # Try importing from motor.hal first (when running from main directory)
-            module = __import__(f"motor.hal.{module_name}", fromlist=[class_name])
+            # Try motor.hal first (when running from the main directory)
+            controller_class = _cached_import(f"motor.hal.{module_name}", class_name)
         except ImportError:
             try:
                 # Fall back to hal.module (when running from motor directory)
-                module = __import__(f"hal.{module_name}", fromlist=[class_name])
+                controller_class = _cached_import(f"hal.{module_name}", class_name)
             except ImportError:
                 raise ImportError(f"Could not import {module_name} for {controller_type}")
-        
-        # Get the controller class and instantiate it
-        controller_class = getattr(module, class_name)
+
         return controller_class()
-    
-        self.mqtt_client = mqtt.Client()
-        self.mqtt_client.on_connect = self.on_connect
-        self.mqtt_client.on_message = self.on_message
-        self.mqtt_client.on_disconnect = self.on_disconnect
-        
-        # Heartbeat monitoring
-        self.last_heartbeat = time.time()
-        self.heartbeat_timeout = self.config["mqtt"]["heartbeat_timeout_seconds"]
-        self.heartbeat_monitoring = self.config["safety"]["heartbeat_monitoring"]
-        
-        # Status publishing
-        self.status_thread = None
-        self.running = False
-        
+
+    def _warmup(self):
+        """Bind the hot HAL methods and exercise get_status once.
+
+        Resolves every descriptor the command paths touch at init time,
+        so the first MQTT message doesn't pay import or attribute
+        resolution costs on top of the motor write.
+        """
+        hal = self.motor_hal
+        self._fwd = hal.start_forward
+        self._back = hal.start_backward
+        self._left = hal.start_left
+        self._right = hal.start_right
+        self._stop = hal.stop
+        self._set_speed = hal.set_speed
+        hal.get_status()
+
     def load_config(self, config_file):
         """Load configuration from JSON file"""
         try:
-            with open(config_file, 'r') as f:
-                return json.load(f)
+            with open(config_file, 'rb') as f:
+                return _json_loads(f.read())
         except FileNotFoundError:
-            print(f"Config file {config_file} not found, using defaults")
+            log.warning("Config file %s not found, using defaults", config_file)
             return self.get_default_config()
             
     def get_default_config(self):
@@ -99,36 +243,91 @@ class UniversalMotorController:
     def on_connect(self, client, userdata, flags, rc):
         """MQTT connection callback"""
         if rc == 0:
-            print("Connected to MQTT broker")
+            log.info("Connected to MQTT broker")
             # Subscribe to command topic
-            command_topic = self.config["mqtt"]["topics"]["command"]
-            client.subscribe(command_topic)
-            print(f"Subscribed to {command_topic}")
+            # Commands must not be lost (QoS 1); binary frames are a
+            # high-rate realtime stream where a stale retry is worse
+            # than a drop, so they stay at QoS 0
+            client.subscribe(self.settings.command_topic, qos=1)
+            client.subscribe(self.binary_command_topic, qos=0)
+            log.info("Subscribed to %s", self.settings.command_topic)
         else:
-            print(f"Failed to connect to MQTT broker, code: {rc}")
+            log.error("Failed to connect to MQTT broker, code: %s", rc)
             
     def on_disconnect(self, client, userdata, rc):
         """MQTT disconnect callback"""
-        print("Disconnected from MQTT broker")
-        if self.config["safety"]["auto_stop_on_disconnect"]:
-            print("Auto-stopping motors due to disconnect")
+        log.warning("Disconnected from MQTT broker")
+        if self.settings.auto_stop_on_disconnect:
+            log.warning("Auto-stopping motors due to disconnect")
             self.motor_hal.stop()
             
     def on_message(self, client, userdata, msg):
         """MQTT message callback"""
         try:
-            command = msg.payload.decode('utf-8').strip()
-            print(f"Received command: {command}")
-            
-            # Update heartbeat
-            self.last_heartbeat = time.time()
-            
-            # Process command
-            self.process_command(command)
+            # Update heartbeat - a plain attribute store, so held-key
+            # command streams cost nothing beyond this line
+            self.last_heartbeat = _monotonic()
+
+            if msg.topic == self.binary_command_topic:
+                self.process_binary_command(msg.payload)
+                return
+
+            payload = msg.payload.strip()
+
+            # Single-letter jog commands take the table fast path and
+            # skip the line parser entirely
+            if len(payload) == 1:
+                fn = self._byte_dispatch[payload[0]]
+                if fn is not None:
+                    fn(self.settings.default_speed)
+                    return
+
+            # The controller batches queued commands newline-separated
+            # into one publish, so treat the payload as one line each.
+            # Commands are pure ASCII: work on the bytes and decode only
+            # the short command token
+            for line in payload.splitlines():
+                line = line.strip().upper()
+                if not line:
+                    continue
+                cmd_bytes, sep, raw_value = line.partition(b":")
+                if sep:
+                    try:
+                        value = int(raw_value)
+                    except ValueError:
+                        log.warning("Invalid value in command: %r", line)
+                        continue
+                else:
+                    value = self.settings.default_speed
+                try:
+                    cmd = sys.intern(cmd_bytes.decode("ascii"))
+                except UnicodeDecodeError:
+                    log.warning("Invalid command: %r", line)
+                    continue
+                self._execute(cmd, value)
             
-        except Exception as e:
-            print(f"Error processing message: {e}")
+        except Exception:
+            log.exception("Error processing message")
             
+    def process_binary_command(self, payload):
+        """Decode compact binary command frames (2-byte opcode/speed pairs)"""
+        for i in range(0, len(payload) - 1, 2):
+            op, value = struct.unpack_from('!BB', payload, i)
+            if op == 1:
+                self._fwd(value)
+            elif op == 2:
+                self._back(value)
+            elif op == 3:
+                self._left(value)
+            elif op == 4:
+                self._right(value)
+            elif op == 5 or op == 6:
+                self._stop()
+            elif op == 7:
+                self._set_speed(value)
+            else:
+                log.warning("Unknown binary opcode: %s", op)
+
     def process_command(self, command):
         """Process incoming motor commands"""
         command = command.upper()
@@ -136,131 +335,175 @@ class UniversalMotorController:
         # Parse command format: COMMAND:VALUE or just COMMAND
         if ":" in command:
             cmd, value = command.split(":", 1)
+            cmd = sys.intern(cmd)
             try:
                 value = int(value)
             except ValueError:
-                print(f"Invalid value in command: {command}")
+                log.warning("Invalid value in command: %s", command)
                 return
         else:
             cmd = command
-            value = self.config["motor_settings"]["default_speed_percent"]
+            value = self.settings.default_speed
             
-        # Execute commands
+        self._execute(cmd, value)
+
+    def _execute(self, cmd, value):
+        """Run a parsed command through the dispatch table"""
+        entry = self._dispatch.get(cmd)
+        if entry is None:
+            log.warning("Unknown command: %s", cmd)
+            return
+
+        handler, message = entry
         try:
-            if cmd == "START_FORWARD" or cmd == "FORWARD":
-                self.motor_hal.start_forward(value)
-                print(f"Started forward at {value}% speed")
-                
-            elif cmd == "START_BACKWARD" or cmd == "BACKWARD":
-                self.motor_hal.start_backward(value)
-                print(f"Started backward at {value}% speed")
-                
-            elif cmd == "START_LEFT" or cmd == "LEFT":
-                self.motor_hal.start_left(value)
-                print(f"Started left turn at {value}% speed")
-                
-            elif cmd == "START_RIGHT" or cmd == "RIGHT":
-                self.motor_hal.start_right(value)
-                print(f"Started right turn at {value}% speed")
-                
-            elif cmd == "STOP":
-                self.motor_hal.stop()
-                print("Motors stopped")
-                
-            elif cmd == "SPEED":
-                self.motor_hal.set_speed(value)
-                print(f"Speed changed to {value}%")
-                
-            elif cmd == "STATUS":
-                self.publish_status()
-                
-            elif cmd == "EMERGENCY_STOP" or cmd == "E_STOP":
-                self.motor_hal.stop()
-                print("EMERGENCY STOP activated")
-                
-            # Legacy single-character commands for backward compatibility
-            elif cmd == "F":
-                self.motor_hal.start_forward()
-                print("Started forward (legacy command)")
-                
-            elif cmd == "B":
-                self.motor_hal.start_backward()
-                print("Started backward (legacy command)")
-                
-            elif cmd == "L":
-                self.motor_hal.start_left()
-                print("Started left turn (legacy command)")
-                
-            elif cmd == "R":
-                self.motor_hal.start_right()
-                print("Started right turn (legacy command)")
-                
-            elif cmd == "S":
-                self.motor_hal.stop()
-                print("Stopped (legacy command)")
-                
-            else:
-                print(f"Unknown command: {cmd}")
-                
-        except Exception as e:
-            print(f"Error executing command {cmd}: {e}")
+            handler(value)
+            if message is not None:
+                # Lazy %-formatting: skipped entirely below DEBUG
+                log.debug(message, value)
+        except Exception:
+            log.exception("Error executing command %s", cmd)
             
-    def publish_status(self):
-        """Publish current motor status"""
+    def publish_status(self, force=False):
+        """Publish current motor status; force skips delta suppression"""
         try:
-            status = self.motor_hal.get_status()
-            status["timestamp"] = time.time()
-            status["controller_type"] = self.config["motor_controller"]["type"]
-            
-            status_topic = self.config["mqtt"]["topics"]["status"]
-            self.mqtt_client.publish(status_topic, json.dumps(status))
+            # get_status returns the HAL's reused dict - copy before
+            # adding fields of our own
+            status = dict(self.motor_hal.get_status())
+            if self.settings.status_compact:
+                status = {_COMPACT_KEYS.get(k, k): v
+                          for k, v in status.items()}
+
+            # Delta suppression: when the motor state hasn't changed
+            # (hashed before the timestamp is added), skip the publish,
+            # letting one snapshot through every 30 cycles as keepalive.
+            # Explicit STATUS requests pass force=True and always answer.
+            state_hash = hash(_json_dumps(status))
+            if (not force and
+                    state_hash == self._last_status_hash and
+                    self._cycles_since_full < _STATUS_KEEPALIVE_CYCLES):
+                self._cycles_since_full += 1
+                return
+            self._last_status_hash = state_hash
+            self._cycles_since_full = 0
+
+            ts_key = "t" if self.settings.status_compact else "timestamp"
+            status[ts_key] = _wall_time()
+
+            # Splice the mutable fields onto the constant prefix rather
+            # than re-serializing the whole message every 2 seconds.
+            # Status is a live stream: QoS 0 avoids the PUBACK round
+            # trip and broker bookkeeping a 2 Hz feed doesn't need
+            payload = self._status_prefix + _json_dumps(status)[1:]
+            self.mqtt_client.publish(self.settings.status_topic, payload,
+                                     qos=0, retain=False)
             
-        except Exception as e:
-            print(f"Error publishing status: {e}")
+        except Exception:
+            log.exception("Error publishing status")
             
-    def heartbeat_monitor(self):
-        """Monitor heartbeat and stop motors if timeout"""
+    def _collect_status_sample(self):
+        """Buffer one status sample, publishing when the batch is full"""
+        # get_status returns the HAL's reused dict, so copy before buffering
+        status = dict(self.motor_hal.get_status())
+        status["timestamp"] = _wall_time()
+        if self.settings.status_compact:
+            status = {_COMPACT_KEYS.get(k, k): v for k, v in status.items()}
+        self._status_buffer.append(status)
+        if len(self._status_buffer) >= self.settings.status_batch:
+            self._flush_status_buffer()
+
+    def _flush_status_buffer(self):
+        """Publish the buffered samples as a single array message"""
+        if not self._status_buffer:
+            return
+        try:
+            samples = list(self._status_buffer)
+            self._status_buffer.clear()
+            payload = (self._status_prefix + b'"samples":' +
+                       _json_dumps(samples) + b'}')
+            self.mqtt_client.publish(self.settings.status_topic, payload,
+                                     qos=0, retain=False)
+        except Exception:
+            log.exception("Error publishing status batch")
+
+    def _arm_hb_timer(self, delay):
+        """Arm the single heartbeat timer for the given delay"""
+        timer = threading.Timer(delay, self._on_hb_timeout)
+        timer.daemon = True
+        timer.start()
+        self._hb_timer = timer
+
+    def _on_hb_timeout(self):
+        """Check the heartbeat deadline; stop the motors if it passed.
+
+        Messages only stamp last_heartbeat, so when traffic arrived
+        since the timer was armed this fires early - re-arm for the
+        remaining interval instead of stopping. A timer thread is thus
+        created at most once per timeout period, not once per message.
+        """
+        remaining = (self.settings.heartbeat_timeout -
+                     (_monotonic() - self.last_heartbeat))
+        if remaining > 0:
+            self._arm_hb_timer(remaining)
+            return
+        log.warning("Heartbeat timeout (%ss), stopping motors",
+                    self.settings.heartbeat_timeout)
+        self.motor_hal.stop()
+        # Restart the deadline from now so a quiet link produces one
+        # stop per timeout of fresh traffic, not one per re-arm
+        self.last_heartbeat = _monotonic()
+        if self.running:
+            self._arm_hb_timer(self.settings.heartbeat_timeout)
+
+    def _status_tick(self):
+        """One status-publisher cycle"""
+        if self.settings.status_batch > 1:
+            self._collect_status_sample()
+        else:
+            self.publish_status()
+
+    def _scheduler_run(self):
+        """Run all periodic work from one blocking heap-driven loop.
+
+        The heap of (deadline, task) entries keeps room for more
+        periodic jobs; with the heartbeat now event-driven it carries
+        just the status publisher. With paho's network loop on its own
+        thread, this runs directly on the main thread.
+        """
+        now = _monotonic()
+        # (next_deadline, tiebreaker, callback, period_seconds)
+        tasks = [(now + 2.0, 0, self._status_tick, 2.0)]
+        heapq.heapify(tasks)
+
         while self.running:
-            if self.heartbeat_monitoring:
-                time_since_heartbeat = time.time() - self.last_heartbeat
-                if time_since_heartbeat > self.heartbeat_timeout:
-                    print(f"Heartbeat timeout ({time_since_heartbeat:.1f}s), stopping motors")
-                    self.motor_hal.stop()
-                    # Reset heartbeat to prevent repeated stops
-                    self.last_heartbeat = time.time()
-                    
-            time.sleep(1)
-            
-    def start_status_publisher(self):
-        """Start background thread for status publishing"""
-        def status_publisher():
-            while self.running:
-                self.publish_status()
-                time.sleep(2)  # Publish status every 2 seconds
-                
-        self.status_thread = threading.Thread(target=status_publisher, daemon=True)
-        self.status_thread.start()
-        
-    def start_heartbeat_monitor(self):
-        """Start background thread for heartbeat monitoring"""
-        if self.heartbeat_monitoring:
-            heartbeat_thread = threading.Thread(target=self.heartbeat_monitor, daemon=True)
-            heartbeat_thread.start()
-            
+            deadline, seq, callback, period = tasks[0]
+            delay = deadline - _monotonic()
+            if delay > 0:
+                time.sleep(delay)
+                continue
+            heapq.heapreplace(tasks, (deadline + period, seq,
+                                      callback, period))
+            callback()
+
     def run(self):
         """Main run loop"""
+        logging.basicConfig(
+            level=os.environ.get("UMC_LOG", "INFO"),
+            format="%(asctime)s %(levelname)s %(message)s")
         try:
             # Connect to MQTT broker
-            broker = self.config["mqtt"]["broker"]
-            port = self.config["mqtt"]["port"]
+            broker = self.settings.broker
+            port = self.settings.port
             
-            print(f"Connecting to MQTT broker at {broker}:{port}")
+            log.info("Connecting to MQTT broker at %s:%s", broker, port)
             self.mqtt_client.connect(broker, port, 60)
             
-            # Start background threads
+            # Network I/O runs on paho's own thread; the main thread
+            # becomes the scheduler
             self.running = True
-            self.start_status_publisher()
-            self.start_heartbeat_monitor()
+            self.mqtt_client.loop_start()
+            if self.settings.heartbeat_monitoring:
+                self.last_heartbeat = _monotonic()
+                self._arm_hb_timer(self.settings.heartbeat_timeout)
             
             print("Universal Motor Controller started")
             print("Available commands:")
@@ -273,23 +516,29 @@ class UniversalMotorController:
             print("  STATUS            - Request status update")
             print("  EMERGENCY_STOP    - Emergency stop")
             
-            # Blocking call for MQTT
-            self.mqtt_client.loop_forever()
+            # Blocking scheduler loop on the main thread
+            self._scheduler_run()
             
         except KeyboardInterrupt:
-            print("\nShutting down...")
-        except Exception as e:
-            print(f"Error: {e}")
+            log.info("Shutting down...")
+        except Exception:
+            log.exception("Error in main loop")
         finally:
             self.cleanup()
             
     def cleanup(self):
         """Clean shutdown"""
         self.running = False
+        if self._hb_timer is not None:
+            self._hb_timer.cancel()
+            self._hb_timer = None
+        # Ship any partial status batch before the client goes away
+        self._flush_status_buffer()
         self.motor_hal.stop()
         self.motor_hal.cleanup()
+        self.mqtt_client.loop_stop()
         self.mqtt_client.disconnect()
-        print("Motor controller stopped")
+        log.info("Motor controller stopped")
 
 if __name__ == "__main__":
     # Allow config file to be specified as command line argument